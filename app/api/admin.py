@@ -1,50 +1,220 @@
 from datetime import date
-import os
+from typing import Literal
+import csv
+import io
+import json
+import threading
+import time
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, update
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.config import (
+    ADMIN_COUNT_CACHE_SECONDS,
+    BADGE_EXPORT_MAX,
+    BULK_CHUNK_SIZE,
+    EXPORT_BATCH_SIZE,
+)
+from app.core.database import SessionLocal, get_db
 from app.core.admin import require_admin
 from app.models.submission import TaxSubmission
 from app.models.user import User
-from app.models.schemas import AdminSubmissionCreate, RejectSubmissionRequest
-from app.services.badge_service import get_badge_for_tax
-from app.services.badge_generator import generate_badge
-from app.services.badge_pdf import generate_badge_pdf
+from app.models.schemas import (
+    AdminSubmissionCreate,
+    BadgeExportRequest,
+    BulkSubmissionAction,
+    RejectSubmissionRequest,
+    RetierRequest,
+)
+from app.services.artifact_store import delete_artifacts
+from app.services.badge_service import classify_submissions, get_badge_for_tax
+from app.services.render_queue import (
+    FAILED,
+    READY,
+    badge_payload,
+    enqueue_render,
+    enqueue_render_batch,
+    get_render_status,
+)
+from app.services.verify_cache import verify_cache
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
 
+def _issue_badge(submission: TaxSubmission) -> None:
+    generated_at = date.today()
+    expiry_at = date(generated_at.year + 1, 3, 31)
+
+    submission.status = "APPROVED"
+    submission.badge_id = f"NB-{uuid.uuid4().hex[:10].upper()}"
+    submission.badge_generated_at = generated_at
+    submission.badge_expires_at = expiry_at
+    submission.admin_comment = "Approved"
+
+
+_count_cache: dict[tuple, tuple[float, int]] = {}
+_count_cache_lock = threading.Lock()
+
+
+def _cached_count(query, cache_key: tuple) -> int:
+    now = time.monotonic()
+
+    with _count_cache_lock:
+        cached = _count_cache.get(cache_key)
+        if cached is not None and now - cached[0] < ADMIN_COUNT_CACHE_SECONDS:
+            return cached[1]
+
+    total = query.with_entities(func.count(TaxSubmission.id)).order_by(None).scalar()
+
+    with _count_cache_lock:
+        if len(_count_cache) >= 1024:
+            _count_cache.clear()
+        _count_cache[cache_key] = (now, total)
+
+    return total
+
+
+def _listing_query(db: Session, status_filter, financial_year, email_prefix):
+    query = (
+        db.query(
+            TaxSubmission.id,
+            TaxSubmission.user_id,
+            User.email,
+            TaxSubmission.financial_year,
+            TaxSubmission.tax_paid,
+            TaxSubmission.badge_name,
+            TaxSubmission.status,
+            TaxSubmission.badge_id,
+            TaxSubmission.badge_expires_at,
+            TaxSubmission.badge_generated_at,
+            TaxSubmission.admin_comment,
+        )
+        .join(User, User.id == TaxSubmission.user_id)
+    )
+
+    if status_filter is not None:
+        query = query.filter(TaxSubmission.status == status_filter)
+    if financial_year is not None:
+        query = query.filter(TaxSubmission.financial_year == financial_year)
+    if email_prefix:
+        query = query.filter(User.email.startswith(email_prefix, autoescape=True))
+
+    return query
+
+
+def _listing_row(row) -> dict:
+    return {
+        "id": row.id,
+        "user_id": row.user_id,
+        "user_email": row.email,
+        "financial_year": row.financial_year,
+        "tax_paid": row.tax_paid,
+        "badge_name": row.badge_name,
+        "status": row.status,
+        "badge_id": row.badge_id,
+        "badge_expires_at": row.badge_expires_at,
+        "badge_generated_at": row.badge_generated_at,
+        "admin_comment": row.admin_comment,
+    }
+
+
+EXPORT_FIELDS = [
+    "id",
+    "user_id",
+    "user_email",
+    "financial_year",
+    "tax_paid",
+    "badge_name",
+    "status",
+    "badge_id",
+    "badge_expires_at",
+    "badge_generated_at",
+    "admin_comment",
+]
+
+
+def _export_rows(export_format: str, status_filter, financial_year, email_prefix):
+    # the request-scoped session may be closed before streaming finishes
+    db = SessionLocal()
+    try:
+        query = (
+            _listing_query(db, status_filter, financial_year, email_prefix)
+            .order_by(TaxSubmission.id)
+            .execution_options(stream_results=True)
+            .yield_per(EXPORT_BATCH_SIZE)
+        )
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+        if export_format == "csv":
+            writer.writeheader()
+
+        for index, row in enumerate(query, start=1):
+            record = _listing_row(row)
+            if export_format == "csv":
+                writer.writerow(record)
+            else:
+                buffer.write(json.dumps(record, default=str))
+                buffer.write("\n")
+
+            if index % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
+
+
+@router.get("/submissions/export")
+def export_submissions(
+    export_format: Literal["csv", "ndjson"] = Query(default="csv", alias="format"),
+    status_filter: str | None = Query(default=None, alias="status"),
+    financial_year: str | None = None,
+    email_prefix: str | None = None,
+    admin=Depends(require_admin),
+):
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    filename = f"submissions.{export_format}"
+
+    return StreamingResponse(
+        _export_rows(export_format, status_filter, financial_year, email_prefix),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get("/submissions")
 def list_all_submissions(
+    cursor: int | None = Query(default=None, description="Return rows with an id lower than this"),
+    limit: int = Query(default=50, ge=1, le=500),
+    status_filter: str | None = Query(default=None, alias="status"),
+    financial_year: str | None = None,
+    email_prefix: str | None = None,
     db: Session = Depends(get_db),
     admin=Depends(require_admin)
 ):
-    submissions = (
-        db.query(TaxSubmission, User.email)
-        .join(User, User.id == TaxSubmission.user_id)
-        .order_by(TaxSubmission.id.desc())
-        .all()
-    )
+    query = _listing_query(db, status_filter, financial_year, email_prefix)
+
+    total = _cached_count(query, (status_filter, financial_year, email_prefix))
+
+    if cursor is not None:
+        query = query.filter(TaxSubmission.id < cursor)
+
+    rows = query.order_by(TaxSubmission.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
 
-    return [
-        {
-            "id": submission.id,
-            "user_id": submission.user_id,
-            "user_email": email,
-            "financial_year": submission.financial_year,
-            "tax_paid": submission.tax_paid,
-            "badge_name": submission.badge_name,
-            "status": submission.status,
-            "badge_id": submission.badge_id,
-            "badge_expires_at": submission.badge_expires_at,
-            "badge_generated_at": submission.badge_generated_at,
-            "admin_comment": submission.admin_comment,
-        }
-        for submission, email in submissions
-    ]
+    return {
+        "items": [_listing_row(row) for row in rows],
+        "next_cursor": rows[-1].id if has_more else None,
+        "total": total,
+    }
 
 
 @router.post("/submit-for-user")
@@ -65,7 +235,7 @@ def submit_for_user(
         user_id=user.id,
         financial_year=payload.financial_year,
         tax_paid=payload.tax_paid,
-        badge_name=get_badge_for_tax(payload.tax_paid),
+        badge_name=get_badge_for_tax(payload.tax_paid, payload.financial_year),
         status="PENDING"
     )
 
@@ -87,13 +257,20 @@ def approve_submission(
     db: Session = Depends(get_db),
     admin=Depends(require_admin),
 ):
-    submission = db.query(TaxSubmission).filter(TaxSubmission.id == submission_id).first()
+    # the owner's email comes with the submission; it is needed for the render
+    row = (
+        db.query(TaxSubmission, User.email)
+        .outerjoin(User, User.id == TaxSubmission.user_id)
+        .filter(TaxSubmission.id == submission_id)
+        .first()
+    )
 
-    if not submission:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Submission not found",
         )
+    submission, owner_email = row
 
     if submission.status != "PENDING":
         raise HTTPException(
@@ -101,46 +278,28 @@ def approve_submission(
             detail=f"Cannot approve submission with status {submission.status}",
         )
 
-    user = db.query(User).filter(User.id == submission.user_id).first()
-    if not user:
+    if owner_email is None:
         raise HTTPException(status_code=404, detail="Submission user not found")
 
-    generated_at = date.today()
-    expiry_at = date(generated_at.year + 1, 3, 31)
-
-    submission.status = "APPROVED"
-    submission.badge_id = f"NB-{uuid.uuid4().hex[:10].upper()}"
-    submission.badge_generated_at = generated_at
-    submission.badge_expires_at = expiry_at
-    submission.admin_comment = "Approved"
-
-    generate_badge(
-        badge_name=submission.badge_name or "Nation Builder",
-        badge_id=submission.badge_id,
-        fy=submission.financial_year,
-        requestor_name=user.email,
-        generated_date=generated_at.isoformat(),
-        expiry_date=expiry_at.isoformat(),
-    )
-    generate_badge_pdf(
-        badge_name=submission.badge_name or "Nation Builder",
-        badge_id=submission.badge_id,
-        fy=submission.financial_year,
-        requestor_name=user.email,
-        generated_date=generated_at.isoformat(),
-        expiry_date=expiry_at.isoformat(),
-    )
-
-    db.commit()
-    db.refresh(submission)
-
-    return {
+    _issue_badge(submission)
+    # read everything before the commit expires the instance, so nothing
+    # has to be loaded again afterwards
+    payload = badge_payload(submission, owner_email)
+    result = {
         "message": "Badge issued successfully",
         "submission_id": submission.id,
         "badge_id": submission.badge_id,
         "generated_at": submission.badge_generated_at,
         "expires_at": submission.badge_expires_at,
     }
+    db.commit()
+    verify_cache.invalidate(result["badge_id"])
+
+    # rendering happens off the request thread once the approval is committed
+    enqueue_render(payload)
+
+    result["render_status"] = get_render_status(result["badge_id"]) or READY
+    return result
 
 
 @router.post("/reject/{submission_id}")
@@ -164,9 +323,233 @@ def reject_submission(
     submission.status = "REJECTED"
     submission.admin_comment = payload.comment
     db.commit()
-    db.refresh(submission)
 
-    return {"message": "Submission rejected", "submission_id": submission.id}
+    return {"message": "Submission rejected", "submission_id": submission_id}
+
+
+def _bulk_target_ids(payload: BulkSubmissionAction, db: Session) -> list[int]:
+    if payload.submission_ids is not None:
+        return list(dict.fromkeys(payload.submission_ids))
+
+    query = db.query(TaxSubmission.id).filter(TaxSubmission.status == "PENDING")
+
+    if payload.financial_year is not None:
+        query = query.filter(TaxSubmission.financial_year == payload.financial_year)
+    if payload.badge_name is not None:
+        query = query.filter(TaxSubmission.badge_name == payload.badge_name)
+    if payload.min_tax is not None:
+        query = query.filter(TaxSubmission.tax_paid >= payload.min_tax)
+    if payload.max_tax is not None:
+        query = query.filter(TaxSubmission.tax_paid <= payload.max_tax)
+
+    return [row.id for row in query.order_by(TaxSubmission.id).all()]
+
+
+def _queue_chunk_renders(renders: list[tuple[int, dict]], results: dict[int, dict]) -> None:
+    # the chunk is already committed: a render that cannot be queued is
+    # reported on its result (it renders on first download) instead of
+    # failing the whole request
+    try:
+        enqueue_render_batch([render_payload for _, render_payload in renders])
+    except Exception:
+        for submission_id, _ in renders:
+            results[submission_id]["render_status"] = FAILED
+        return
+
+    for submission_id, render_payload in renders:
+        results[submission_id]["render_status"] = get_render_status(render_payload["badge_id"]) or READY
+
+
+@router.post("/bulk")
+def bulk_update_submissions(
+    payload: BulkSubmissionAction,
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin),
+):
+    has_filter = any(
+        value is not None
+        for value in (payload.financial_year, payload.badge_name, payload.min_tax, payload.max_tax)
+    )
+    if payload.submission_ids is None and not has_filter:
+        raise HTTPException(
+            status_code=400,
+            detail="Provide submission_ids or at least one filter",
+        )
+
+    if payload.action == "reject" and not payload.comment:
+        raise HTTPException(status_code=400, detail="A comment is required to reject submissions")
+
+    target_ids = _bulk_target_ids(payload, db)
+    results: dict[int, dict] = {}
+
+    for start in range(0, len(target_ids), BULK_CHUNK_SIZE):
+        chunk_ids = target_ids[start:start + BULK_CHUNK_SIZE]
+        rows = (
+            db.query(TaxSubmission, User.email)
+            .outerjoin(User, User.id == TaxSubmission.user_id)
+            .filter(TaxSubmission.id.in_(chunk_ids))
+            .all()
+        )
+        found = {submission.id: (submission, email) for submission, email in rows}
+        chunk_renders = []
+
+        for submission_id in chunk_ids:
+            if submission_id not in found:
+                results[submission_id] = {"ok": False, "detail": "Submission not found"}
+                continue
+
+            submission, email = found[submission_id]
+
+            if submission.status != "PENDING":
+                results[submission_id] = {
+                    "ok": False,
+                    "detail": f"Cannot {payload.action} submission with status {submission.status}",
+                }
+                continue
+
+            if payload.action == "approve":
+                if email is None:
+                    results[submission_id] = {"ok": False, "detail": "Submission user not found"}
+                    continue
+
+                _issue_badge(submission)
+                chunk_renders.append((submission_id, badge_payload(submission, email)))
+                results[submission_id] = {
+                    "ok": True,
+                    "status": "APPROVED",
+                    "badge_id": submission.badge_id,
+                }
+            else:
+                submission.status = "REJECTED"
+                submission.admin_comment = payload.comment
+                results[submission_id] = {"ok": True, "status": "REJECTED"}
+
+        db.commit()
+        # after the commit, so the write transaction never waits on the cache
+        verify_cache.invalidate_many(render_payload["badge_id"] for _, render_payload in chunk_renders)
+        _queue_chunk_renders(chunk_renders, results)
+
+    succeeded = sum(1 for result in results.values() if result["ok"])
+    return {
+        "action": payload.action,
+        "requested": len(target_ids),
+        "succeeded": succeeded,
+        "failed": len(target_ids) - succeeded,
+        "results": results,
+    }
+
+
+@router.post("/retier")
+def retier_submissions(
+    payload: RetierRequest,
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin),
+):
+    scanned = 0
+    updated: dict[str, int] = {}
+    render_payloads = []
+    last_id = 0
+
+    while True:
+        query = (
+            db.query(
+                TaxSubmission.id,
+                TaxSubmission.financial_year,
+                TaxSubmission.tax_paid,
+                TaxSubmission.badge_name,
+                TaxSubmission.status,
+            )
+            .filter(TaxSubmission.status.in_(payload.statuses), TaxSubmission.id > last_id)
+        )
+        if payload.financial_year is not None:
+            query = query.filter(TaxSubmission.financial_year == payload.financial_year)
+
+        rows = query.order_by(TaxSubmission.id).limit(BULK_CHUNK_SIZE).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        scanned += len(rows)
+
+        badges = classify_submissions((row.financial_year, row.tax_paid) for row in rows)
+        changes = [
+            (row, badge) for row, badge in zip(rows, badges) if row.badge_name != badge
+        ]
+        if not changes:
+            continue
+
+        db.execute(update(TaxSubmission), [{"id": row.id, "badge_name": badge} for row, badge in changes])
+        db.commit()
+
+        for _, badge in changes:
+            updated[badge] = updated.get(badge, 0) + 1
+
+        # issued badges carry the tier on the image and in verify results
+        reissued = [row.id for row, _ in changes if row.status == "APPROVED"]
+        if reissued:
+            chunk_payloads = [
+                badge_payload(submission, email)
+                for submission, email in (
+                    db.query(TaxSubmission, User.email)
+                    .join(User, User.id == TaxSubmission.user_id)
+                    .filter(TaxSubmission.id.in_(reissued))
+                )
+            ]
+            verify_cache.invalidate_many(render_payload["badge_id"] for render_payload in chunk_payloads)
+            render_payloads.extend(chunk_payloads)
+
+    enqueue_render_batch(render_payloads)
+
+    return {
+        "scanned": scanned,
+        "updated": sum(updated.values()),
+        "updated_by_badge": updated,
+        "rerendering": len(render_payloads),
+    }
+
+
+@router.post("/badges/export")
+def export_badges(
+    payload: BadgeExportRequest,
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin),
+):
+    submission_ids = list(dict.fromkeys(payload.submission_ids))
+    if len(submission_ids) > BADGE_EXPORT_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {BADGE_EXPORT_MAX} badges can be exported at once",
+        )
+
+    rows = (
+        db.query(TaxSubmission, User.email)
+        .join(User, User.id == TaxSubmission.user_id)
+        .filter(
+            TaxSubmission.id.in_(submission_ids),
+            TaxSubmission.status == "APPROVED",
+            TaxSubmission.badge_id.isnot(None),
+        )
+        .order_by(TaxSubmission.id)
+        .all()
+    )
+
+    if not rows:
+        raise HTTPException(status_code=404, detail="No approved badges found")
+
+    payloads = [badge_payload(submission, email) for submission, email in rows]
+
+    # ReportLab is only loaded once someone actually exports
+    from app.services.badge_pdf import generate_badge_pdf_batch, generate_badge_zip
+
+    if payload.format == "zip":
+        content, media_type = generate_badge_zip(payloads), "application/zip"
+    else:
+        content, media_type = generate_badge_pdf_batch(payloads), "application/pdf"
+
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="badges.{payload.format}"'},
+    )
 
 
 @router.delete("/invalidate/{submission_id}")
@@ -184,17 +567,17 @@ def invalidate_badge(
         raise HTTPException(status_code=400, detail="No badge to invalidate")
 
     badge_id = submission.badge_id
-    png_path = f"app/static/badges/{badge_id}.png"
-    pdf_path = f"app/static/badges/{badge_id}.pdf"
-
-    if os.path.exists(png_path):
-        os.remove(png_path)
-    if os.path.exists(pdf_path):
-        os.remove(pdf_path)
+    delete_artifacts(db, badge_id)
 
     submission.status = "INVALIDATED"
     submission.admin_comment = "Badge invalidated by admin"
     submission.badge_id = None
     db.commit()
+    verify_cache.invalidate(badge_id)
 
     return {"message": "Badge invalidated and files removed", "submission_id": submission.id}
+
+
+@router.get("/verify-cache")
+def verify_cache_stats(admin=Depends(require_admin)):
+    return verify_cache.stats()
@@ -1,63 +1,84 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-from jose import jwt
-from passlib.context import CryptContext
 
+from app.core.auth import Principal, create_access_token, get_current_principal, revoke_token
 from app.core.database import get_db
+from app.core.security import (
+    PasswordHasherBusy,
+    hash_password_async,
+    verify_and_update_password_async,
+)
 from app.models.user import User
 from app.models.schemas import UserCreate, UserResponse
 from app.core.admin import is_admin_email
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
-# ---------------- CONFIG ----------------
-SECRET_KEY = "dev-secret-key"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_HOURS = 12
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # ---------------- UTILS ----------------
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+def create_token(user: User) -> str:
+    role = "admin" if is_admin_email(user.email) else "user"
+    return create_access_token(user.id, user.email, role)
 
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+def _get_user_by_email(db: Session, email: str) -> User | None:
+    return db.query(User).filter(User.email == email).first()
 
-def create_token(user_id: int) -> str:
-    payload = {
-        "sub": str(user_id),
-        "exp": datetime.utcnow() + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
-    }
-    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+def _auth_busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Authentication is busy, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
 
 # ---------------- SIGNUP ----------------
+# Both routes are async so that hashing waits on the bounded password pool
+# instead of pinning one of FastAPI's shared threadpool slots.
 @router.post("/signup", response_model=UserResponse)
-def signup(user: UserCreate, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.email == user.email).first():
+async def signup(user: UserCreate, db: Session = Depends(get_db)):
+    if await run_in_threadpool(_get_user_by_email, db, user.email):
         raise HTTPException(status_code=400, detail="Email already registered")
 
+    try:
+        hashed_password = await hash_password_async(user.password)
+    except PasswordHasherBusy:
+        raise _auth_busy()
+
     db_user = User(
         email=user.email,
-        hashed_password=hash_password(user.password),
+        hashed_password=hashed_password,
         is_verified=False
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+
+    def _save():
+        db.add(db_user)
+        db.commit()
+        db.refresh(db_user)
+
+    await run_in_threadpool(_save)
     return db_user
 
 # ---------------- LOGIN ----------------
 @router.post("/login")
-def login(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
+async def login(user: UserCreate, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(_get_user_by_email, db, user.email)
 
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+    if not db_user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    return {
-        "access_token": create_token(db_user.id),
+    try:
+        valid, new_hash = await verify_and_update_password_async(
+            user.password, db_user.hashed_password
+        )
+    except PasswordHasherBusy:
+        raise _auth_busy()
+
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # built before any commit: the commit expires db_user, and reading it
+    # afterwards would reload the row with a blocking query on the event loop
+    response = {
+        "access_token": create_token(db_user),
         "token_type": "bearer",
         "user": {
             "id": db_user.id,
@@ -65,3 +86,19 @@ def login(user: UserCreate, db: Session = Depends(get_db)):
             "is_admin": is_admin_email(db_user.email)
         }
     }
+
+    if new_hash:
+        # hashing parameters changed since this password was stored
+        db_user.hashed_password = new_hash
+        await run_in_threadpool(db.commit)
+
+    return response
+
+# ---------------- LOGOUT ----------------
+@router.post("/logout")
+def logout(
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+):
+    revoke_token(db, principal)
+    return {"message": "Logged out"}
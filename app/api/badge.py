@@ -1,110 +1,276 @@
-from datetime import date
-from pathlib import Path
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.auth import get_current_user
-from app.core.database import get_db
-from app.core.admin import is_admin_email
+from app.core.admin import has_admin_rights
+from app.core.auth import Principal, get_current_principal
+from app.core.config import DOWNLOAD_ACCEL_PREFIX, DOWNLOAD_OFFLOAD, RENDER_WAIT_SECONDS
+from app.core.database import SessionLocal, get_async_db
+from app.core.http_cache import etag_matches
+from app.models.artifact import BadgeArtifact
 from app.models.submission import TaxSubmission
 from app.models.user import User
-from app.services.badge_generator import generate_badge
-from app.services.badge_pdf import generate_badge_pdf
+from app.services.artifact_store import get_artifact_store, get_artifacts, get_artifacts_async
+from app.services.render_queue import (
+    QUEUED,
+    READY,
+    RENDERING,
+    badge_payload,
+    get_render_status,
+    record_render_timings,
+    render_badge_files,
+    wait_for_render,
+)
+from app.services.single_flight import single_flight
 
 router = APIRouter(prefix="/badge", tags=["Badge"])
 
 
-def _ensure_access(submission: TaxSubmission, current_user: User):
-    if submission.user_id != current_user.id and not is_admin_email(current_user.email):
+def _ensure_access(submission: TaxSubmission, principal: Principal):
+    if submission.user_id != principal.id and not has_admin_rights(principal):
         raise HTTPException(status_code=403, detail="Not authorized to access this badge")
 
 
-def _ensure_files(submission: TaxSubmission, user: User):
+def _owner_email(db: Session, submission: TaxSubmission) -> str:
+    email = db.query(User.email).filter(User.id == submission.user_id).scalar()
+    if email is None:
+        raise HTTPException(status_code=404, detail="Submission user not found")
+    return email
+
+
+def _ensure_artifacts(db: Session, submission: TaxSubmission) -> dict | None:
     if not submission.badge_id:
         raise HTTPException(status_code=404, detail="Badge not found")
 
-    png_path = Path(f"app/static/badges/{submission.badge_id}.png")
-    pdf_path = Path(f"app/static/badges/{submission.badge_id}.pdf")
+    artifacts = get_artifacts(db, submission.badge_id)
+    missing = [kind for kind in ("png", "pdf") if kind not in artifacts]
+    if not missing:
+        return artifacts
 
-    generated_at = (submission.badge_generated_at or date.today()).isoformat()
-    expiry_at = (submission.badge_expires_at or date.today()).isoformat()
+    render_status = wait_for_render(submission.badge_id, RENDER_WAIT_SECONDS)
+    if render_status in (QUEUED, RENDERING):
+        return None
 
-    if not png_path.exists():
-        generate_badge(
-            badge_name=submission.badge_name or "Nation Builder",
-            badge_id=submission.badge_id,
-            fy=submission.financial_year,
-            requestor_name=user.email,
-            generated_date=generated_at,
-            expiry_date=expiry_at,
-        )
+    # one request renders a cold badge; concurrent ones block here and then
+    # pick up what it stored instead of rendering the same files again
+    with single_flight(submission.badge_id):
+        db.expire_all()
+        artifacts = get_artifacts(db, submission.badge_id)
+        missing = [kind for kind in ("png", "pdf") if kind not in artifacts]
+        if missing:
+            timings = render_badge_files(badge_payload(submission, _owner_email(db, submission)), kinds=missing)
+            record_render_timings(timings.items())
+            artifacts = get_artifacts(db, submission.badge_id)
 
-    if not pdf_path.exists():
-        generate_badge_pdf(
-            badge_name=submission.badge_name or "Nation Builder",
-            badge_id=submission.badge_id,
-            fy=submission.financial_year,
-            requestor_name=user.email,
-            generated_date=generated_at,
-            expiry_date=expiry_at,
-        )
+    return artifacts
 
 
-@router.get("/{badge_id}/png")
-def download_badge_png(
-    badge_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    submission = (
-        db.query(TaxSubmission)
-        .filter(
+def _rendering_response(badge_id: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=202,
+        content={
+            "badge_id": badge_id,
+            "render_status": get_render_status(badge_id) or RENDERING,
+            "detail": "Badge is still rendering, retry shortly",
+        },
+        headers={"Retry-After": "2"},
+    )
+
+
+async def _get_approved_submission(badge_id: str, db: AsyncSession) -> TaxSubmission:
+    submission = await db.scalar(
+        select(TaxSubmission)
+        .where(
             TaxSubmission.badge_id == badge_id,
             TaxSubmission.status == "APPROVED",
         )
-        .first()
+        .limit(1)
     )
 
     if not submission:
         raise HTTPException(status_code=404, detail="Badge not found")
 
-    user = db.query(User).filter(User.id == submission.user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Submission user not found")
+    return submission
 
-    _ensure_access(submission, current_user)
-    _ensure_files(submission, user)
 
-    path = f"app/static/badges/{badge_id}.png"
-    return FileResponse(path, media_type="image/png", filename=f"{badge_id}.png")
+def _not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
 
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(microsecond=0) <= since.replace(tzinfo=None)
 
-@router.get("/{badge_id}/pdf")
-def download_badge_pdf(
+    return False
+
+
+def _parse_range(range_header: str, size: int) -> tuple[int, int] | None:
+    # only single ranges are served; anything else falls back to the full body
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        raise ValueError("unsupported range")
+
+    start_text, _, end_text = spec.strip().partition("-")
+    if not start_text:
+        length = int(end_text)
+        if length <= 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def _artifact_response(request: Request, artifact: BadgeArtifact, filename: str) -> Response:
+    store = get_artifact_store()
+    etag = f'"{artifact.sha256}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(artifact.created_at.replace(tzinfo=timezone.utc), usegmt=True),
+        "Cache-Control": "private, no-cache",
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    }
+
+    if _not_modified(request, etag, artifact.created_at):
+        return Response(status_code=304, headers=headers)
+
+    local_path = store.local_path(artifact.storage_key)
+    if DOWNLOAD_OFFLOAD and local_path is not None:
+        # the proxy serves the bytes (and any Range) straight from disk
+        if DOWNLOAD_OFFLOAD == "x-accel":
+            headers["X-Accel-Redirect"] = DOWNLOAD_ACCEL_PREFIX + artifact.storage_key
+        else:
+            headers["X-Sendfile"] = str(local_path)
+        return Response(media_type=artifact.mime_type, headers=headers)
+
+    start, end = 0, artifact.size - 1
+    status_code = 200
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        try:
+            byte_range = _parse_range(range_header, artifact.size)
+        except ValueError:
+            byte_range = (start, end)
+
+        if byte_range is None:
+            headers["Content-Range"] = f"bytes */{artifact.size}"
+            return Response(status_code=416, headers=headers)
+
+        if byte_range != (0, artifact.size - 1):
+            start, end = byte_range
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{artifact.size}"
+
+    body = store.open_range(artifact.storage_key, start, end)
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        body,
+        status_code=status_code,
+        media_type=artifact.mime_type,
+        headers=headers,
+    )
+
+
+def _download_rendering(request: Request, submission: TaxSubmission, kind: str) -> Response:
+    badge_id = submission.badge_id
+    filename = f"{badge_id}.{kind}"
+
+    with SessionLocal() as db:
+        artifacts = _ensure_artifacts(db, submission)
+        if artifacts is None:
+            return _rendering_response(badge_id)
+
+        try:
+            return _artifact_response(request, artifacts[kind], filename)
+        except FileNotFoundError:
+            pass
+
+        # the metadata outlived its file: drop it and regenerate once
+        with single_flight(badge_id):
+            db.expire_all()
+            stale = get_artifacts(db, badge_id).get(kind)
+            if stale is not None and not get_artifact_store().exists(stale.storage_key):
+                db.delete(stale)
+                db.commit()
+
+        artifacts = _ensure_artifacts(db, submission)
+        if artifacts is None:
+            return _rendering_response(badge_id)
+
+        return _artifact_response(request, artifacts[kind], filename)
+
+
+async def _download(
+    request: Request,
     badge_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    kind: str,
+    db: AsyncSession,
+    principal: Principal,
+) -> Response:
+    submission = await _get_approved_submission(badge_id, db)
+    _ensure_access(submission, principal)
+
+    artifact = (await get_artifacts_async(db, badge_id)).get(kind)
+    if artifact is not None:
+        try:
+            # opening the artifact blocks on disk or S3, so it runs off the loop
+            return await run_in_threadpool(_artifact_response, request, artifact, f"{badge_id}.{kind}")
+        except FileNotFoundError:
+            pass
+
+    # cold or stale badges render and wait on locks; keep that on a worker thread
+    return await run_in_threadpool(_download_rendering, request, submission, kind)
+
+
+@router.get("/{badge_id}/status")
+async def badge_render_status(
+    badge_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    principal: Principal = Depends(get_current_principal),
 ):
-    submission = (
-        db.query(TaxSubmission)
-        .filter(
-            TaxSubmission.badge_id == badge_id,
-            TaxSubmission.status == "APPROVED",
-        )
-        .first()
-    )
+    submission = await _get_approved_submission(badge_id, db)
+    _ensure_access(submission, principal)
 
-    if not submission:
-        raise HTTPException(status_code=404, detail="Badge not found")
+    render_status = get_render_status(badge_id)
+    if render_status is None:
+        artifacts = await get_artifacts_async(db, badge_id)
+        render_status = READY if {"png", "pdf"} <= artifacts.keys() else "MISSING"
+
+    return {"badge_id": badge_id, "render_status": render_status}
 
-    user = db.query(User).filter(User.id == submission.user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Submission user not found")
 
-    _ensure_access(submission, current_user)
-    _ensure_files(submission, user)
+@router.get("/{badge_id}/png")
+async def download_badge_png(
+    badge_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    principal: Principal = Depends(get_current_principal),
+):
+    return await _download(request, badge_id, "png", db, principal)
+
 
-    path = f"app/static/badges/{badge_id}.pdf"
-    return FileResponse(path, media_type="application/pdf", filename=f"{badge_id}.pdf")
+@router.get("/{badge_id}/pdf")
+async def download_badge_pdf(
+    badge_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    principal: Principal = Depends(get_current_principal),
+):
+    return await _download(request, badge_id, "pdf", db, principal)
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
-from app.core.auth import get_current_user
-from app.models.user import User
+from app.core.database import get_async_db, get_db
+from app.core.auth import Principal, get_current_principal
 from app.models.submission import TaxSubmission
 from app.models.schemas import TaxSubmissionCreate, TaxSubmissionResponse
 from app.services.badge_service import get_badge_for_tax
@@ -14,13 +15,13 @@ router = APIRouter(prefix="/submission", tags=["Tax Submission"])
 @router.post("/", response_model=TaxSubmissionResponse)
 def submit_tax(
     submission: TaxSubmissionCreate,
-    current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
-    badge = get_badge_for_tax(submission.tax_paid)
+    badge = get_badge_for_tax(submission.tax_paid, submission.financial_year)
 
     new_submission = TaxSubmission(
-        user_id=current_user.id,
+        user_id=principal.id,
         financial_year=submission.financial_year,
         tax_paid=submission.tax_paid,
         badge_name=badge,
@@ -35,47 +36,46 @@ def submit_tax(
 
 
 @router.get("/me", response_model=TaxSubmissionResponse | None)
-def get_my_latest_submission(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def get_my_latest_submission(
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    submission = (
-        db.query(TaxSubmission)
-        .filter(TaxSubmission.user_id == current_user.id)
+    submission = await db.scalar(
+        select(TaxSubmission)
+        .where(TaxSubmission.user_id == principal.id)
         .order_by(TaxSubmission.id.desc())
-        .first()
+        .limit(1)
     )
 
     return submission
 
 
 @router.get("/mine", response_model=list[TaxSubmissionResponse])
-def get_my_submissions(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def get_my_submissions(
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    return (
-        db.query(TaxSubmission)
-        .filter(TaxSubmission.user_id == current_user.id)
+    submissions = await db.scalars(
+        select(TaxSubmission)
+        .where(TaxSubmission.user_id == principal.id)
         .order_by(TaxSubmission.id.desc())
-        .all()
     )
+    return submissions.all()
 
 
 @router.get("/my-badges")
-def get_my_badges(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def get_my_badges(
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    submissions = (
-        db.query(TaxSubmission)
-        .filter(
-            TaxSubmission.user_id == current_user.id,
+    submissions = await db.scalars(
+        select(TaxSubmission)
+        .where(
+            TaxSubmission.user_id == principal.id,
             TaxSubmission.status == "APPROVED",
             TaxSubmission.badge_id.isnot(None),
         )
         .order_by(TaxSubmission.id.desc())
-        .all()
     )
 
     return [
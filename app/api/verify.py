@@ -1,46 +1,196 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from datetime import date
+import hashlib
+import json
+import time
+from datetime import date, datetime, timedelta
+from typing import AsyncIterator
 
-from app.core.auth import get_current_user
-from app.core.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.auth import Principal, get_current_principal
+from app.core.config import VERIFY_BATCH_MAX, VERIFY_PUBLIC_MAX_AGE
+from app.core.database import AsyncSessionLocal, get_async_db
+from app.core.http_cache import etag_matches
+from app.models.schemas import BatchVerifyRequest
 from app.models.submission import TaxSubmission
-from app.models.user import User
+from app.services.verify_cache import cache_entry, verification_result, verify_cache
 
 router = APIRouter(prefix="/verify", tags=["Verification"])
 
+# badge IDs per IN (...) query; stays well under SQLite's bound-parameter limit
+BATCH_QUERY_SIZE = 500
 
-@router.get("/{badge_id}")
-def verify_badge(
-    badge_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    submission = (
-        db.query(TaxSubmission)
-        .filter(
+
+async def _load_entry(badge_id: str, db: AsyncSession) -> dict | None:
+    cached = verify_cache.get(badge_id)
+    if cached is not None:
+        return cached
+
+    loaded_at = time.time()
+    submission = await db.scalar(
+        select(TaxSubmission)
+        .where(
             TaxSubmission.badge_id == badge_id,
             TaxSubmission.status == "APPROVED"
         )
-        .first()
+        .limit(1)
     )
 
     if not submission:
+        return None
+
+    entry = cache_entry(submission)
+    verify_cache.set(badge_id, entry, loaded_at)
+    return entry
+
+
+def _etag(result: dict) -> str:
+    fingerprint = f"{result['badge_id']}:{result['status']}:{result['expires_at']}"
+    return '"' + hashlib.sha256(fingerprint.encode()).hexdigest()[:32] + '"'
+
+
+def _cache_headers(result: dict) -> dict:
+    # the status can flip to EXPIRED at midnight, so never cache across it
+    now = datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    max_age = max(0, min(VERIFY_PUBLIC_MAX_AGE, int((midnight - now).total_seconds())))
+
+    return {
+        "ETag": _etag(result),
+        "Cache-Control": f"public, max-age={max_age}",
+    }
+
+
+@router.get("/public/{badge_id}")
+async def verify_badge_public(
+    badge_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+):
+    entry = await _load_entry(badge_id, db)
+
+    if entry is None:
+        return JSONResponse(
+            status_code=404,
+            content={"detail": "Invalid badge ID"},
+            headers={"Cache-Control": "no-cache"},
+        )
+
+    result = verification_result(entry)
+    headers = _cache_headers(result)
+
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    return JSONResponse(
+        content={
+            "valid": result["valid"],
+            "status": result["status"],
+            "badge_name": result["badge_name"],
+            "financial_year": result["financial_year"],
+            "expires_at": result["expires_at"].isoformat() if result["expires_at"] else None,
+        },
+        headers=headers,
+    )
+
+
+@router.get("/{badge_id}")
+async def verify_badge(
+    badge_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    principal: Principal = Depends(get_current_principal),
+):
+    entry = await _load_entry(badge_id, db)
+
+    if entry is None:
         raise HTTPException(
             status_code=404,
             detail="Invalid badge ID"
         )
 
-    is_expired = (
-        submission.badge_expires_at is not None
-        and submission.badge_expires_at < date.today()
-    )
+    return verification_result(entry)
+
+
+async def _batch_entries(badge_ids: list[str]) -> AsyncIterator[tuple[str, dict | None]]:
+    # owns its session so a streamed response can keep reading after the
+    # request's dependencies have been torn down
+    async with AsyncSessionLocal() as db:
+        for start in range(0, len(badge_ids), BATCH_QUERY_SIZE):
+            chunk = badge_ids[start:start + BATCH_QUERY_SIZE]
+            entries = {badge_id: verify_cache.get(badge_id) for badge_id in chunk}
+
+            missing = [badge_id for badge_id, entry in entries.items() if entry is None]
+            if missing:
+                loaded_at = time.time()
+                rows = await db.execute(
+                    select(
+                        TaxSubmission.badge_id,
+                        TaxSubmission.badge_name,
+                        TaxSubmission.financial_year,
+                        TaxSubmission.badge_expires_at,
+                    ).where(
+                        TaxSubmission.badge_id.in_(missing),
+                        TaxSubmission.status == "APPROVED",
+                    )
+                )
+                for row in rows:
+                    entry = cache_entry(row)
+                    verify_cache.set(row.badge_id, entry, loaded_at)
+                    entries[row.badge_id] = entry
+
+            for badge_id in chunk:
+                yield badge_id, entries[badge_id]
 
+
+def _batch_result(entry: dict | None, today: date) -> dict:
+    if entry is None:
+        return {"status": "NOT_FOUND"}
+
+    result = verification_result(entry, today)
     return {
-        "valid": not is_expired,
-        "badge_id": submission.badge_id,
-        "badge_name": submission.badge_name,
-        "financial_year": submission.financial_year,
-        "expires_at": submission.badge_expires_at,
-        "status": "EXPIRED" if is_expired else "VALID"
+        "status": result["status"],
+        "badge_name": result["badge_name"],
+        "financial_year": result["financial_year"],
+        "expires_at": result["expires_at"].isoformat() if result["expires_at"] else None,
     }
+
+
+@router.post("/batch")
+async def verify_badges_batch(
+    payload: BatchVerifyRequest,
+    stream: bool = False,
+    principal: Principal = Depends(get_current_principal),
+):
+    badge_ids = list(dict.fromkeys(payload.badge_ids))
+    if len(badge_ids) > VERIFY_BATCH_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {VERIFY_BATCH_MAX} badge IDs can be verified at once",
+        )
+
+    today = date.today()
+
+    if stream:
+        async def _lines():
+            # one write per query chunk rather than per badge
+            lines = []
+            async for badge_id, entry in _batch_entries(badge_ids):
+                lines.append(json.dumps({"badge_id": badge_id, **_batch_result(entry, today)}))
+                if len(lines) == BATCH_QUERY_SIZE:
+                    yield "\n".join(lines) + "\n"
+                    lines = []
+            if lines:
+                yield "\n".join(lines) + "\n"
+
+        return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+    results = {}
+    counts = {"VALID": 0, "EXPIRED": 0, "NOT_FOUND": 0}
+    async for badge_id, entry in _batch_entries(badge_ids):
+        result = _batch_result(entry, today)
+        counts[result["status"]] += 1
+        results[badge_id] = result
+
+    return {"counts": counts, "results": results}
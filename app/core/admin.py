@@ -1,7 +1,6 @@
 from fastapi import Depends, HTTPException, status
 
-from app.core.auth import get_current_user
-from app.models.user import User
+from app.core.auth import Principal, get_current_principal
 
 ADMIN_EMAILS = {
     "admin@example.com",
@@ -12,11 +11,17 @@ def is_admin_email(email: str) -> bool:
     return email in ADMIN_EMAILS
 
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
-    if not is_admin_email(current_user.email):
+def has_admin_rights(principal: Principal) -> bool:
+    # the role claim lasts as long as the token; the email check means
+    # removing someone from ADMIN_EMAILS takes effect straight away
+    return principal.is_admin and is_admin_email(principal.email)
+
+
+def require_admin(principal: Principal = Depends(get_current_principal)) -> Principal:
+    if not has_admin_rights(principal):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required",
         )
 
-    return current_user
+    return principal
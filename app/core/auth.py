@@ -1,56 +1,190 @@
-from fastapi import Depends, Security, HTTPException, status
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from fastapi import Security, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
-from app.models.user import User
+from app.core.config import (
+    ACCESS_TOKEN_EXPIRE_HOURS,
+    JWT_ALGORITHM,
+    JWT_SECRET_KEY,
+    PRINCIPAL_CACHE_MAX_ENTRIES,
+    PRINCIPAL_CACHE_SECONDS,
+    TOKEN_REVOCATION_REFRESH_SECONDS,
+)
+from app.core.database import SessionLocal
+from app.models.revoked_token import RevokedToken
 
 # ------------------------------------------------------------------
-# CONFIG
+# SECURITY SCHEME
 # ------------------------------------------------------------------
 
-SECRET_KEY = "dev-secret-key"
-ALGORITHM = "HS256"
+security = HTTPBearer()
 
 # ------------------------------------------------------------------
-# SECURITY SCHEME
+# TOKENS
 # ------------------------------------------------------------------
 
-security = HTTPBearer()
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    role: str
+    jti: str
+    expires_at: float
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == "admin"
+
+
+def create_access_token(user_id: int, email: str, role: str) -> str:
+    payload = {
+        "sub": str(user_id),
+        "email": email,
+        "role": role,
+        "jti": uuid.uuid4().hex,
+        "exp": datetime.utcnow() + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS),
+    }
+    return jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
+
+
+def _decode(token: str) -> Principal:
+    try:
+        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+    except JWTError:
+        raise _unauthorized("Invalid or expired token")
+
+    user_id = payload.get("sub")
+    if user_id is None:
+        raise _unauthorized("Invalid token payload")
+
+    if not all(payload.get(claim) for claim in ("email", "role", "jti")):
+        # issued before tokens carried their claims
+        raise _unauthorized("Token is outdated, please log in again")
+
+    return Principal(
+        id=int(user_id),
+        email=payload["email"],
+        role=payload["role"],
+        jti=payload["jti"],
+        expires_at=float(payload["exp"]),
+    )
 
 # ------------------------------------------------------------------
-# CURRENT USER DEPENDENCY
+# REVOCATION
 # ------------------------------------------------------------------
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Security(security),
-    db: Session = Depends(get_db),
-):
-    token = credentials.credentials
+_revoked: set[str] = set()
+_revoked_loaded_at = float("-inf")
+_revoked_lock = threading.Lock()
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
 
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token payload",
+def _revocations_stale() -> bool:
+    return time.monotonic() - _revoked_loaded_at >= TOKEN_REVOCATION_REFRESH_SECONDS
+
+
+def _refresh_revocations() -> None:
+    global _revoked, _revoked_loaded_at
+
+    if not _revocations_stale():
+        return
+
+    with _revoked_lock:
+        if not _revocations_stale():
+            return
+
+        now = time.monotonic()
+
+        with SessionLocal() as db:
+            rows = (
+                db.query(RevokedToken.jti)
+                .filter(RevokedToken.expires_at > datetime.utcnow())
+                .all()
             )
+        _revoked = {row.jti for row in rows}
+        _revoked_loaded_at = now
 
-    except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token",
+
+def revoke_token(db: Session, principal: Principal) -> None:
+    if db.get(RevokedToken, principal.jti) is None:
+        db.add(
+            RevokedToken(
+                jti=principal.jti,
+                user_id=principal.id,
+                expires_at=datetime.utcfromtimestamp(principal.expires_at),
+            )
         )
+        db.commit()
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    with _revoked_lock:
+        _revoked.add(principal.jti)
+    _forget_principal(principal.jti)
+
+# ------------------------------------------------------------------
+# PRINCIPAL CACHE
+# ------------------------------------------------------------------
+
+_principals: OrderedDict[str, tuple[float, Principal]] = OrderedDict()
+_principals_lock = threading.Lock()
 
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-        )
 
-    return user
+def _forget_principal(jti: str) -> None:
+    with _principals_lock:
+        for key in [key for key, (_, cached) in _principals.items() if cached.jti == jti]:
+            del _principals[key]
+
+
+def principal_from_token(token: str) -> Principal:
+    key = hashlib.sha256(token.encode()).hexdigest()
+    now = time.time()
+
+    with _principals_lock:
+        cached = _principals.get(key)
+        if cached is not None and cached[0] > now:
+            _principals.move_to_end(key)
+            principal = cached[1]
+        else:
+            principal = None
+
+    if principal is None:
+        principal = _decode(token)
+        # never cache a principal past the expiry of its token
+        cache_until = min(now + PRINCIPAL_CACHE_SECONDS, principal.expires_at)
+        with _principals_lock:
+            _principals[key] = (cache_until, principal)
+            while len(_principals) > PRINCIPAL_CACHE_MAX_ENTRIES:
+                _principals.popitem(last=False)
+
+    # reads the list as last loaded; only get_current_principal reloads it,
+    # off the event loop
+    if principal.jti in _revoked:
+        raise _unauthorized("Token has been revoked")
+
+    return principal
+
+# ------------------------------------------------------------------
+# CURRENT USER DEPENDENCIES
+# ------------------------------------------------------------------
+
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Security(security),
+) -> Principal:
+    # authorises from the token alone on the event loop; only the periodic
+    # reload of the revocation list touches the database
+    if _revocations_stale():
+        await run_in_threadpool(_refresh_revocations)
+    return principal_from_token(credentials.credentials)
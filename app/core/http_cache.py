@@ -0,0 +1,11 @@
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag (RFC 9110 13.1.2).
+
+    Proxies that rewrite bodies (e.g. nginx gzip) weaken ETags to W/"...",
+    which must still match for a 304.
+    """
+    if not if_none_match:
+        return False
+
+    candidates = {value.strip().removeprefix("W/") for value in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates or "*" in candidates
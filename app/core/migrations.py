@@ -0,0 +1,217 @@
+"""Versioned schema migrations.
+
+Migrations run in order and each one runs once per database. The highest
+applied version is recorded in the ``schema_version`` table. Add new steps
+to the end of ``MIGRATIONS``; never edit or reorder ones that have shipped.
+
+They are applied by ``python -m app.tools.migrate`` before a deploy; the app
+itself only checks the recorded version when it starts.
+"""
+
+from typing import Callable, NamedTuple
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    UniqueConstraint,
+    inspect,
+    select,
+    text,
+)
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, nullable=False),
+)
+
+# ------------------------------------------------------------------
+# VERSION 1: the schema when versioning started, frozen. Model changes
+# after that are new migrations, never edits here, so every database
+# reaches each version with the same shape.
+# ------------------------------------------------------------------
+
+_v1 = MetaData()
+
+Table(
+    "users",
+    _v1,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True, index=True, nullable=False),
+    Column("hashed_password", String, nullable=False),
+    Column("is_verified", Boolean),
+)
+
+Table(
+    "tax_submissions",
+    _v1,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("financial_year", String, nullable=False),
+    Column("tax_paid", Integer, nullable=False),
+    Column("badge_name", String),
+    Column("status", String),
+    Column("badge_id", String, unique=True),
+    Column("badge_expires_at", Date),
+    Column("badge_generated_at", Date),
+    Column("admin_comment", String),
+)
+
+Table(
+    "badge_artifacts",
+    _v1,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("badge_id", String, nullable=False, index=True),
+    Column("kind", String, nullable=False),
+    Column("storage_key", String, nullable=False),
+    Column("sha256", String, nullable=False),
+    Column("size", Integer, nullable=False),
+    Column("mime_type", String, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    UniqueConstraint("badge_id", "kind", name="uq_badge_artifacts_badge_kind"),
+)
+
+Table(
+    "revoked_tokens",
+    _v1,
+    Column("jti", String, primary_key=True),
+    Column("user_id", Integer, nullable=False),
+    Column("expires_at", DateTime, nullable=False, index=True),
+)
+
+
+def _baseline(conn) -> None:
+    # databases created before versioning already have some of this
+    _v1.create_all(conn)
+
+    columns = {column["name"] for column in inspect(conn).get_columns("tax_submissions")}
+    if "admin_comment" not in columns:
+        conn.execute(text("ALTER TABLE tax_submissions ADD COLUMN admin_comment VARCHAR"))
+    if "badge_generated_at" not in columns:
+        conn.execute(text("ALTER TABLE tax_submissions ADD COLUMN badge_generated_at DATE"))
+
+
+def _create_indexes(table: str, indexes: dict[str, tuple[str, ...]]):
+    # spelled out rather than read from the models, which keep changing
+    def migrate(conn) -> None:
+        # CONCURRENTLY builds without locking out writes; needs autocommit
+        concurrently = "CONCURRENTLY " if conn.dialect.name == "postgresql" else ""
+        for name, columns in indexes.items():
+            conn.execute(text(
+                f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+            ))
+
+    return migrate
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    migrate: Callable
+    # non-transactional steps run in autocommit mode and must be idempotent
+    transactional: bool = True
+
+
+MIGRATIONS = [
+    Migration(1, "baseline schema", _baseline),
+    Migration(
+        2,
+        "tax_submissions indexes for user, badge and status lookups",
+        _create_indexes(
+            "tax_submissions",
+            {
+                "ix_tax_submissions_user_id_id": ("user_id", "id"),
+                "ix_tax_submissions_user_id_status_id": ("user_id", "status", "id"),
+                "ix_tax_submissions_status_id": ("status", "id"),
+            },
+        ),
+        transactional=False,
+    ),
+]
+
+HEAD = MIGRATIONS[-1].version
+
+
+class SchemaOutdated(RuntimeError):
+    pass
+
+
+def current_version(conn) -> int:
+    if not inspect(conn).has_table(schema_version.name):
+        return 0
+    return conn.execute(select(schema_version.c.version)).scalar() or 0
+
+
+def _set_version(conn, version: int) -> None:
+    conn.execute(schema_version.delete())
+    conn.execute(schema_version.insert().values(version=version))
+
+
+_LOCK_ID = 728160391
+
+
+def pending(engine) -> list[Migration]:
+    with engine.connect() as conn:
+        version = current_version(conn)
+    return [migration for migration in MIGRATIONS if migration.version > version]
+
+
+def upgrade(engine, on_step: Callable[[Migration], None] | None = None) -> list[int]:
+    applied = []
+
+    # concurrent runs queue up on a Postgres session lock. It is held on an
+    # idle connection, since CREATE INDEX CONCURRENTLY waits for every open
+    # transaction. SQLite serialises writers on its own.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        if lock_conn.dialect.name == "postgresql":
+            lock_conn.execute(text(f"SELECT pg_advisory_lock({_LOCK_ID})"))
+        try:
+            with engine.begin() as conn:
+                schema_version.create(conn, checkfirst=True)
+
+            for migration in MIGRATIONS:
+                with engine.connect() as conn:
+                    if current_version(conn) >= migration.version:
+                        continue
+
+                if on_step is not None:
+                    on_step(migration)
+
+                # one transaction per step, so a failure leaves the last good version
+                if migration.transactional:
+                    with engine.begin() as conn:
+                        migration.migrate(conn)
+                        _set_version(conn, migration.version)
+                else:
+                    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                        migration.migrate(conn)
+                    with engine.begin() as conn:
+                        _set_version(conn, migration.version)
+
+                applied.append(migration.version)
+        finally:
+            if lock_conn.dialect.name == "postgresql":
+                lock_conn.execute(text(f"SELECT pg_advisory_unlock({_LOCK_ID})"))
+
+    return applied
+
+
+def ensure_current(engine) -> int:
+    """Cheap startup check: one read of schema_version, no DDL."""
+    with engine.connect() as conn:
+        version = current_version(conn)
+
+    # a newer schema is fine while old workers drain during a deploy
+    if version < HEAD:
+        raise SchemaOutdated(
+            f"Database schema is at version {version}, this build needs {HEAD}. "
+            "Run `python -m app.tools.migrate` first."
+        )
+    return version
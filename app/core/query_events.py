@@ -0,0 +1,62 @@
+"""One pair of cursor-execute listeners on the app's engines.
+
+Metrics and the SQL profiler both need every statement with its duration.
+Rather than each hooking the engines and keeping its own timing stack, they
+register a consumer here: a callable taking (statement, parameters, seconds),
+called after each statement finishes.
+
+Nothing is hooked into the engines until the first consumer is added.
+"""
+
+import threading
+import time
+from typing import Callable
+
+QueryConsumer = Callable[[str, object, float], None]
+
+_consumers: tuple[QueryConsumer, ...] = ()
+_lock = threading.Lock()
+_installed = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    for consumer in _consumers:
+        consumer(statement, parameters, elapsed)
+
+
+def _handle_error(exception_context):
+    # a failed statement never reaches after_cursor_execute; drop its start
+    # time so it does not linger on the pooled connection
+    # connect and commit failures have no execution context and push nothing
+    if exception_context.execution_context is None or exception_context.connection is None:
+        return
+    started = exception_context.connection.info.get("query_started")
+    if started:
+        started.pop()
+
+
+def add_consumer(consumer: QueryConsumer) -> None:
+    """Call `consumer` after every statement; adding the same one twice is a no-op."""
+    global _consumers, _installed
+
+    with _lock:
+        if consumer in _consumers:
+            return
+        # replaced rather than appended, so listeners iterate without the lock
+        _consumers = (*_consumers, consumer)
+
+        if not _installed:
+            from sqlalchemy import event
+
+            from app.core.database import async_engine, engine
+
+            for target in (engine, async_engine.sync_engine):
+                event.listen(target, "before_cursor_execute", _before_cursor_execute)
+                event.listen(target, "after_cursor_execute", _after_cursor_execute)
+                event.listen(target, "handle_error", _handle_error)
+            _installed = True
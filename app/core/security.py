@@ -1,9 +1,78 @@
-from passlib.context import CryptContext
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from app.core import metrics
+from app.core.config import (
+    ARGON2_MEMORY_COST,
+    ARGON2_PARALLELISM,
+    ARGON2_TIME_COST,
+    BCRYPT_ROUNDS,
+    PASSWORD_MAX_PENDING,
+    PASSWORD_SCHEMES,
+    PASSWORD_WORKERS,
+)
+
+
+@lru_cache(maxsize=1)
+def pwd_context():
+    # passlib and its hash backends load on the first login, not at import
+    from passlib.context import CryptContext
+
+    settings = {}
+    if "bcrypt" in PASSWORD_SCHEMES:
+        settings["bcrypt__rounds"] = BCRYPT_ROUNDS
+    if "argon2" in PASSWORD_SCHEMES:
+        settings["argon2__time_cost"] = ARGON2_TIME_COST
+        settings["argon2__memory_cost"] = ARGON2_MEMORY_COST
+        settings["argon2__parallelism"] = ARGON2_PARALLELISM
+
+    return CryptContext(schemes=PASSWORD_SCHEMES, deprecated="auto", **settings)
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+# bcrypt and argon2 release the GIL, so a small thread pool gives real
+# parallelism while capping how many cores password work can take
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="password")
+_pending = threading.BoundedSemaphore(PASSWORD_MAX_PENDING)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    started = time.perf_counter()
+    hashed = pwd_context().hash(password)
+    metrics.observe_password("hash", time.perf_counter() - started)
+    return hashed
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    started = time.perf_counter()
+    # the second value is a fresh hash when the stored one uses outdated parameters
+    result = pwd_context().verify_and_update(plain_password, hashed_password)
+    metrics.observe_password("verify", time.perf_counter() - started)
+    return result
+
+
+async def _run_bounded(fn, *args):
+    if not _pending.acquire(blocking=False):
+        raise PasswordHasherBusy()
+
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+    finally:
+        _pending.release()
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_bounded(hash_password, password)
+
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_and_update_password_async(
+    plain_password: str,
+    hashed_password: str,
+) -> tuple[bool, str | None]:
+    return await _run_bounded(verify_and_update_password, plain_password, hashed_password)
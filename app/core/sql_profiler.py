@@ -0,0 +1,181 @@
+"""SQL profiling per request, and query budgets for local checks.
+
+``profile_queries()`` records every statement the app's engines run while it
+is active; ``query_budget()`` does the same and fails when a block issues
+more queries than allowed. With SQL_PROFILE set, every API request is also
+profiled: responses carry X-Query-Count / X-Query-Time-Ms headers, the
+statements go to the "app.sql" logger and statement shapes that repeat
+within one request are logged as likely N+1 queries.
+
+Queries arrive through app.core.query_events; nothing is hooked into the
+engines until one of these is first used.
+"""
+
+import logging
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from app.core.config import SQL_PROFILE_REPEAT_THRESHOLD
+
+logger = logging.getLogger("app.sql")
+
+# literals and bound-parameter lists differ between calls of the same query
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAMETER = r"(?:\?|%\(\w+\)s|%s|\$\d+|:\w+)"
+_PARAMETER_LISTS = re.compile(rf"\(\s*{_PARAMETER}(?:\s*,\s*{_PARAMETER})*\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with whitespace, literals and IN lists normalised."""
+    shape = _LITERALS.sub("?", " ".join(statement.split()))
+    return _PARAMETER_LISTS.sub("(...)", shape)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryLog:
+    """Statements recorded by one profile, in execution order."""
+
+    def __init__(self):
+        # (statement, parameters, seconds)
+        self.queries: list[tuple[str, object, float]] = []
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, parameters, seconds: float) -> None:
+        with self._lock:
+            self.queries.append((statement, parameters, seconds))
+
+    def __len__(self) -> int:
+        return len(self.queries)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(seconds for _, _, seconds in self.queries)
+
+    def repeated(self, threshold: int = SQL_PROFILE_REPEAT_THRESHOLD) -> dict[str, int]:
+        """Statement shapes run at least `threshold` times."""
+        counts = Counter(statement_shape(statement) for statement, _, _ in self.queries)
+        return {shape: count for shape, count in counts.items() if count >= threshold}
+
+    def report(self) -> str:
+        lines = [
+            f"  {index:>3}. {seconds * 1000:8.3f} ms  {' '.join(statement.split())}"
+            for index, (statement, _, seconds) in enumerate(self.queries, 1)
+        ]
+        for shape, count in self.repeated().items():
+            lines.append(f"  repeated {count}x: {shape}")
+        return "\n".join(lines)
+
+# ------------------------------------------------------------------
+# QUERY RECORDING
+# ------------------------------------------------------------------
+
+# profiles that capture every query in the process (profile_queries), and the
+# one capturing the current request (the middleware)
+_active: list[QueryLog] = []
+_active_lock = threading.Lock()
+_request_log: ContextVar[QueryLog | None] = ContextVar("sql_request_log", default=None)
+
+
+def _record_query(statement: str, parameters, seconds: float) -> None:
+    request_log = _request_log.get()
+    if request_log is not None:
+        request_log.record(statement, parameters, seconds)
+    for log in tuple(_active):
+        log.record(statement, parameters, seconds)
+
+
+def install() -> None:
+    """Start receiving the app's queries; safe to call more than once."""
+    from app.core import query_events
+
+    query_events.add_consumer(_record_query)
+
+
+@contextmanager
+def profile_queries():
+    """Record every statement run in this process while the block is active.
+
+    Process-wide rather than per context, so it also sees the queries of a
+    request served by a test client on another thread.
+    """
+    install()
+    log = QueryLog()
+    with _active_lock:
+        _active.append(log)
+    try:
+        yield log
+    finally:
+        with _active_lock:
+            _active.remove(log)
+
+
+@contextmanager
+def query_budget(max_queries: int, label: str = "block"):
+    """Fail with QueryBudgetExceeded when the block runs more than `max_queries` statements.
+
+        with query_budget(1, "verify"):
+            client.get(f"/verify/{badge_id}", headers=headers)
+    """
+    with profile_queries() as log:
+        yield log
+
+    if len(log) > max_queries:
+        raise QueryBudgetExceeded(
+            f"{label} issued {len(log)} queries, budget {max_queries}\n{log.report()}"
+        )
+
+# ------------------------------------------------------------------
+# REQUEST PROFILING (SQL_PROFILE)
+# ------------------------------------------------------------------
+
+
+class QueryProfilerMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog()
+
+        async def send_with_headers(message):
+            # queries run while a streaming body is produced are logged but
+            # cannot be counted in headers that have already gone out
+            if message["type"] == "http.response.start":
+                message = dict(message)
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-query-count", str(len(log)).encode()),
+                    (b"x-query-time-ms", f"{log.total_seconds * 1000:.3f}".encode()),
+                ]
+            await send(message)
+
+        token = _request_log.set(log)
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _request_log.reset(token)
+            _log_request(scope, log)
+
+
+def _log_request(scope, log: QueryLog) -> None:
+    route = getattr(scope.get("route"), "path", scope["path"])
+    logger.info(
+        "%s %s: %d queries, %.3f ms\n%s",
+        scope["method"], route, len(log), log.total_seconds * 1000, log.report(),
+    )
+    for shape, count in log.repeated().items():
+        logger.warning("%s %s ran the same statement %d times (N+1?): %s", scope["method"], route, count, shape)
+
+
+def instrument(app) -> None:
+    install()
+    app.add_middleware(QueryProfilerMiddleware)
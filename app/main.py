@@ -1,36 +1,47 @@
+import importlib
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import text
 
-from app.core.database import Base, engine
-from app.models.user import User
-from app.models.submission import TaxSubmission
-from app.api import auth, submission, admin, verify, badge
+from app.core import migrations
+from app.core.config import APP_PROFILE, METRICS_ENABLED, SQL_PROFILE
+from app.core.database import async_engine, engine
+
+# every mapped class is imported up front so relationships between them
+# resolve, whichever routers the profile mounts
+from app.models import artifact, revoked_token, submission, user  # noqa: F401
 
+# routers are imported by name so a profile never loads the modules it skips
+PROFILE_ROUTERS = {
+    "full": ("auth", "submission", "admin", "verify", "badge"),
+    "verify": ("verify",),
+}
 
-def _ensure_schema_updates() -> None:
-    with engine.connect() as conn:
-        columns = {
-            row[1]
-            for row in conn.execute(text("PRAGMA table_info(tax_submissions)")).fetchall()
-        }
+if APP_PROFILE not in PROFILE_ROUTERS:
+    raise ValueError(f"Unknown APP_PROFILE {APP_PROFILE!r}")
 
-        if "admin_comment" not in columns:
-            conn.execute(text("ALTER TABLE tax_submissions ADD COLUMN admin_comment VARCHAR"))
 
-        if "badge_generated_at" not in columns:
-            conn.execute(text("ALTER TABLE tax_submissions ADD COLUMN badge_generated_at DATE"))
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # migrations are applied by `python -m app.tools.migrate`, never on boot
+    migrations.ensure_current(engine)
 
-        conn.commit()
+    yield
 
+    # imported here, not at the top, so the verify profile never loads it
+    from app.services import render_queue
+
+    await run_in_threadpool(render_queue.shutdown)
+    await async_engine.dispose()
 
-Base.metadata.create_all(bind=engine)
-_ensure_schema_updates()
 
 app = FastAPI(
     title="Nation Builder Badge",
     description="Voluntary civic badge for Indian taxpayers",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -41,11 +52,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(auth.router)
-app.include_router(submission.router)
-app.include_router(admin.router)
-app.include_router(verify.router)
-app.include_router(badge.router)
+for router_name in PROFILE_ROUTERS[APP_PROFILE]:
+    app.include_router(importlib.import_module(f"app.api.{router_name}").router)
+
+if METRICS_ENABLED:
+    from app.core import metrics
+
+    metrics.instrument(app)
+
+if SQL_PROFILE:
+    from app.core import sql_profiler
+
+    sql_profiler.instrument(app)
 
 
 @app.get("/")
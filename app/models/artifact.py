@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, UniqueConstraint
+
+from app.core.database import Base
+
+
+class BadgeArtifact(Base):
+    __tablename__ = "badge_artifacts"
+    __table_args__ = (UniqueConstraint("badge_id", "kind", name="uq_badge_artifacts_badge_kind"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    badge_id = Column(String, nullable=False, index=True)
+    kind = Column(String, nullable=False)  # png / pdf
+
+    storage_key = Column(String, nullable=False)
+    sha256 = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    mime_type = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,4 +1,6 @@
 from datetime import date
+from typing import Literal
+
 from pydantic import BaseModel, EmailStr
 
 
@@ -42,3 +44,27 @@ class AdminSubmissionCreate(BaseModel):
 
 class RejectSubmissionRequest(BaseModel):
     comment: str
+
+
+class BulkSubmissionAction(BaseModel):
+    action: Literal["approve", "reject"]
+    submission_ids: list[int] | None = None
+    financial_year: str | None = None
+    badge_name: str | None = None
+    min_tax: int | None = None
+    max_tax: int | None = None
+    comment: str | None = None
+
+
+class RetierRequest(BaseModel):
+    financial_year: str | None = None
+    statuses: list[Literal["PENDING", "APPROVED", "REJECTED", "INVALIDATED"]] = ["PENDING"]
+
+
+class BatchVerifyRequest(BaseModel):
+    badge_ids: list[str]
+
+
+class BadgeExportRequest(BaseModel):
+    submission_ids: list[int]
+    format: Literal["pdf", "zip"] = "pdf"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, Index
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -6,6 +6,14 @@ from app.core.database import Base
 
 class TaxSubmission(Base):
     __tablename__ = "tax_submissions"
+    __table_args__ = (
+        # /submission/me and /mine: one user's submissions, newest first
+        Index("ix_tax_submissions_user_id_id", "user_id", "id"),
+        # /submission/my-badges: one user's approved badges
+        Index("ix_tax_submissions_user_id_status_id", "user_id", "status", "id"),
+        # admin listing, export and rebuild: keyset pages within a status
+        Index("ix_tax_submissions_status_id", "status", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -0,0 +1,193 @@
+import hashlib
+import os
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    ARTIFACT_BACKEND,
+    ARTIFACT_ROOT,
+    ARTIFACT_S3_BUCKET,
+    ARTIFACT_S3_ENDPOINT_URL,
+    ARTIFACT_S3_PREFIX,
+)
+from app.models.artifact import BadgeArtifact
+
+MIME_TYPES = {
+    "png": "image/png",
+    "pdf": "application/pdf",
+}
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _iter_chunks(handle, remaining: int | None) -> Iterator[bytes]:
+    try:
+        while remaining is None or remaining > 0:
+            size = CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining)
+            chunk = handle.read(size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+    finally:
+        handle.close()
+
+
+def content_key(sha256: str, ext: str) -> str:
+    # two levels of fan-out keep directories small on the local backend
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}.{ext}"
+
+
+class LocalArtifactStore:
+    def __init__(self, root: str):
+        self.root = Path(root).resolve()
+
+    def local_path(self, key: str) -> Path:
+        return self.root / key
+
+    def put(self, key: str, data: bytes, mime_type: str) -> None:
+        path = self.local_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def open_range(self, key: str, start: int = 0, end: int | None = None) -> Iterator[bytes]:
+        # opened eagerly so a missing file surfaces before any response is sent
+        handle = open(self.local_path(key), "rb")
+        handle.seek(start)
+        return _iter_chunks(handle, None if end is None else end - start + 1)
+
+    def exists(self, key: str) -> bool:
+        return self.local_path(key).exists()
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+
+class S3ArtifactStore:
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: str | None = None):
+        import boto3
+
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def local_path(self, key: str) -> None:
+        return None
+
+    def put(self, key: str, data: bytes, mime_type: str) -> None:
+        # a single PutObject is atomic: readers see the old object or the new one
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self.prefix + key,
+            Body=data,
+            ContentType=mime_type,
+        )
+
+    def open_range(self, key: str, start: int = 0, end: int | None = None) -> Iterator[bytes]:
+        extra = {}
+        if start or end is not None:
+            extra["Range"] = f"bytes={start}-{'' if end is None else end}"
+
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self.prefix + key, **extra)
+        except self.client.exceptions.NoSuchKey:
+            raise FileNotFoundError(key)
+
+        return _iter_chunks(response["Body"], None)
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+        except self.client.exceptions.ClientError:
+            return False
+        return True
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store():
+    global _store
+
+    with _store_lock:
+        if _store is None:
+            if ARTIFACT_BACKEND == "s3":
+                _store = S3ArtifactStore(
+                    ARTIFACT_S3_BUCKET,
+                    prefix=ARTIFACT_S3_PREFIX,
+                    endpoint_url=ARTIFACT_S3_ENDPOINT_URL,
+                )
+            elif ARTIFACT_BACKEND == "local":
+                _store = LocalArtifactStore(ARTIFACT_ROOT)
+            else:
+                raise ValueError(f"Unknown ARTIFACT_BACKEND {ARTIFACT_BACKEND!r}")
+        return _store
+
+
+def save_artifact(db: Session, badge_id: str, kind: str, data: bytes) -> BadgeArtifact:
+    sha256 = hashlib.sha256(data).hexdigest()
+    key = content_key(sha256, kind)
+    mime_type = MIME_TYPES[kind]
+
+    get_artifact_store().put(key, data, mime_type)
+
+    artifact = (
+        db.query(BadgeArtifact)
+        .filter(BadgeArtifact.badge_id == badge_id, BadgeArtifact.kind == kind)
+        .first()
+    )
+    if artifact is None:
+        artifact = BadgeArtifact(badge_id=badge_id, kind=kind)
+        db.add(artifact)
+    elif artifact.storage_key != key:
+        get_artifact_store().delete(artifact.storage_key)
+
+    artifact.storage_key = key
+    artifact.sha256 = sha256
+    artifact.size = len(data)
+    artifact.mime_type = mime_type
+    artifact.created_at = datetime.utcnow()
+    return artifact
+
+
+def get_artifacts(db: Session, badge_id: str) -> dict[str, BadgeArtifact]:
+    artifacts = db.query(BadgeArtifact).filter(BadgeArtifact.badge_id == badge_id).all()
+    return {artifact.kind: artifact for artifact in artifacts}
+
+
+async def get_artifacts_async(db: AsyncSession, badge_id: str) -> dict[str, BadgeArtifact]:
+    artifacts = await db.scalars(select(BadgeArtifact).where(BadgeArtifact.badge_id == badge_id))
+    return {artifact.kind: artifact for artifact in artifacts}
+
+
+def delete_artifacts(db: Session, badge_id: str) -> None:
+    store = get_artifact_store()
+    for artifact in get_artifacts(db, badge_id).values():
+        store.delete(artifact.storage_key)
+        db.delete(artifact)
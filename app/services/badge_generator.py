@@ -1,6 +1,9 @@
-from pathlib import Path
+from functools import lru_cache
+from io import BytesIO
+
 from PIL import Image, ImageDraw
-import qrcode
+
+from app.services.qr import badge_qr_renderer, verify_url
 
 
 def _draw_rosette(draw: ImageDraw.ImageDraw):
@@ -23,6 +26,22 @@ def _draw_rosette(draw: ImageDraw.ImageDraw):
     draw.polygon([(742, 200), (778, 292), (810, 200)], fill=navy)
 
 
+@lru_cache(maxsize=32)
+def badge_template(badge_name: str) -> Image.Image:
+    # everything that is the same for every badge of a tier; callers copy it
+    img = Image.new("RGB", (1000, 620), color="#07162D")
+    draw = ImageDraw.Draw(img)
+
+    draw.rounded_rectangle((25, 25, 975, 595), radius=24, outline="#1E3A8A", width=3)
+    _draw_rosette(draw)
+
+    draw.text((50, 55), "Nation Builder Badge", fill="white")
+    draw.text((50, 120), f"Badge Tier: {badge_name}", fill="white")
+    draw.text((50, 410), "Thank you for nation building through your tax contribution.", fill="#FDE68A")
+
+    return img
+
+
 def generate_badge(
     badge_name: str,
     badge_id: str,
@@ -30,28 +49,19 @@ def generate_badge(
     requestor_name: str,
     generated_date: str,
     expiry_date: str,
-):
-    Path("app/static/badges").mkdir(parents=True, exist_ok=True)
-
-    img = Image.new("RGB", (1000, 620), color="#07162D")
+) -> bytes:
+    img = badge_template(badge_name).copy()
     draw = ImageDraw.Draw(img)
 
-    draw.rounded_rectangle((25, 25, 975, 595), radius=24, outline="#1E3A8A", width=3)
-    _draw_rosette(draw)
-
-    draw.text((50, 55), "Nation Builder Badge", fill="white")
-    draw.text((50, 120), f"Badge Tier: {badge_name}", fill="white")
     draw.text((50, 165), f"Financial Year: {fy}", fill="white")
     draw.text((50, 210), f"Unique Badge ID: {badge_id}", fill="white")
     draw.text((50, 255), f"Generated On: {generated_date}", fill="white")
     draw.text((50, 300), f"Expires On: {expiry_date}", fill="white")
     draw.text((50, 345), f"Awarded To: {requestor_name}", fill="white")
-    draw.text((50, 410), "Thank you for nation building through your tax contribution.", fill="#FDE68A")
 
-    qr_url = f"http://127.0.0.1:8000/verify/{badge_id}"
-    qr = qrcode.make(qr_url).resize((190, 190))
+    qr = badge_qr_renderer().render(verify_url(badge_id))
     img.paste(qr, (760, 360))
 
-    path = f"app/static/badges/{badge_id}.png"
-    img.save(path)
-    return path
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
@@ -1,25 +1,48 @@
-from pathlib import Path
+import zipfile
+from functools import lru_cache
+from io import BytesIO
+
 from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen import canvas
 
+from app.core.config import BADGE_PDF_FONT_BOLD_PATH, BADGE_PDF_FONT_PATH
+from app.services.qr import badge_qr_renderer, verify_url
 
-def generate_badge_pdf(
+
+@lru_cache(maxsize=1)
+def pdf_fonts() -> dict:
+    # TTF registration parses the font file, so it happens once per process
+    fonts = {"title": "Helvetica-Bold", "body": "Helvetica", "note": "Helvetica-Oblique"}
+
+    if BADGE_PDF_FONT_PATH:
+        pdfmetrics.registerFont(TTFont("BadgeSans", BADGE_PDF_FONT_PATH))
+        fonts["body"] = fonts["note"] = "BadgeSans"
+    if BADGE_PDF_FONT_BOLD_PATH:
+        pdfmetrics.registerFont(TTFont("BadgeSans-Bold", BADGE_PDF_FONT_BOLD_PATH))
+        fonts["title"] = "BadgeSans-Bold"
+
+    return fonts
+
+
+def _draw_badge_page(
+    c: canvas.Canvas,
     badge_name: str,
     badge_id: str,
     fy: str,
     requestor_name: str,
     generated_date: str,
     expiry_date: str,
-):
-    Path("app/static/badges").mkdir(parents=True, exist_ok=True)
+) -> None:
+    fonts = pdf_fonts()
+    url = verify_url(badge_id)
 
-    path = f"app/static/badges/{badge_id}.pdf"
-    c = canvas.Canvas(path, pagesize=A4)
-
-    c.setFont("Helvetica-Bold", 22)
+    c.setFont(fonts["title"], 22)
     c.drawCentredString(300, 780, "Nation Builder Badge")
 
-    c.setFont("Helvetica", 13)
+    c.setFont(fonts["body"], 13)
     c.drawString(70, 710, f"Badge Tier: {badge_name}")
     c.drawString(70, 685, f"Badge ID: {badge_id}")
     c.drawString(70, 660, f"Financial Year: {fy}")
@@ -27,11 +50,61 @@ def generate_badge_pdf(
     c.drawString(70, 610, f"Expires On: {expiry_date}")
     c.drawString(70, 585, f"Awarded To: {requestor_name}")
 
-    c.setFont("Helvetica-Oblique", 12)
+    # same QR code as the PNG badge
+    qr = badge_qr_renderer().render(url).convert("L")
+    c.drawImage(ImageReader(qr), 70, 335, width=140, height=140)
+
+    c.setFont(fonts["note"], 12)
     c.drawString(70, 535, "Thank you for nation building through your tax contribution.")
 
-    c.setFont("Helvetica", 12)
-    c.drawString(70, 495, f"Verify this badge: http://127.0.0.1:8000/verify/{badge_id}")
+    c.setFont(fonts["body"], 12)
+    c.drawString(70, 495, f"Verify this badge: {url}")
+
+
+def generate_badge_pdf(
+    badge_name: str,
+    badge_id: str,
+    fy: str,
+    requestor_name: str,
+    generated_date: str,
+    expiry_date: str,
+) -> bytes:
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+
+    _draw_badge_page(
+        c,
+        badge_name=badge_name,
+        badge_id=badge_id,
+        fy=fy,
+        requestor_name=requestor_name,
+        generated_date=generated_date,
+        expiry_date=expiry_date,
+    )
+
+    c.save()
+    return buffer.getvalue()
+
+
+def generate_badge_pdf_batch(payloads: list[dict]) -> bytes:
+    # one document, one page per badge, a single canvas for the whole run
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+
+    for payload in payloads:
+        _draw_badge_page(c, **payload)
+        c.showPage()
 
     c.save()
-    return path
+    return buffer.getvalue()
+
+
+def generate_badge_zip(payloads: list[dict]) -> bytes:
+    buffer = BytesIO()
+
+    # PDFs are already compressed, so store them as-is
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+        for payload in payloads:
+            archive.writestr(f"{payload['badge_id']}.pdf", generate_badge_pdf(**payload))
+
+    return buffer.getvalue()
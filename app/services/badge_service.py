@@ -1,13 +1,91 @@
-BADGE_TIERS = [
-    (100000, 299999, "Silver Contributor"),
-    (300000, 599999, "Gold Contributor"),
-    (600000, 999999, "Platinum Contributor"),
-    (1000000, 2499999, "Diamond Nation Builder"),
-    (2500000, float("inf"), "Bharat Ratna Contributor"),
+import json
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import repeat
+from typing import Iterable
+
+from app.core.config import BADGE_TIERS_PATH
+
+NOT_ELIGIBLE = "Not Eligible"
+
+# (lower bound of tax paid, badge). A tier runs up to the next tier's bound,
+# so there are no gaps between tiers; anything below the first is not eligible.
+DEFAULT_TIERS = [
+    (100000, "Silver Contributor"),
+    (300000, "Gold Contributor"),
+    (600000, "Platinum Contributor"),
+    (1000000, "Diamond Nation Builder"),
+    (2500000, "Bharat Ratna Contributor"),
 ]
 
-def get_badge_for_tax(tax_paid: int) -> str:
-    for min_tax, max_tax, badge in BADGE_TIERS:
-        if min_tax <= tax_paid <= max_tax:
-            return badge
-    return "Not Eligible"
+
+class TierTable:
+    """Tiers compiled into a sorted bound array for bisect lookups."""
+
+    __slots__ = ("bounds", "names")
+
+    def __init__(self, tiers: Iterable[tuple[int, str]]):
+        ordered = sorted((int(bound), name) for bound, name in tiers)
+        self.bounds = [bound for bound, _ in ordered]
+        if len(set(self.bounds)) != len(self.bounds):
+            raise ValueError("Badge tiers must have distinct lower bounds")
+
+        # index 0 is "below the first bound"
+        self.names = (NOT_ELIGIBLE, *(name for _, name in ordered))
+
+    def classify(self, tax_paid: int) -> str:
+        return self.names[bisect_right(self.bounds, tax_paid)]
+
+    def classify_many(self, taxes: Iterable[int]) -> list[str]:
+        # both loops run in C: one bisect per value, then one tuple lookup
+        return list(map(self.names.__getitem__, map(bisect_right, repeat(self.bounds), taxes)))
+
+
+# financial year -> table, with None mapped to the default; filled on first use
+_TABLES: dict[str | None, TierTable] = {}
+
+
+def _load_tables() -> dict[str | None, TierTable]:
+    tables: dict[str | None, TierTable] = {}
+    if BADGE_TIERS_PATH:
+        with open(BADGE_TIERS_PATH) as handle:
+            config = json.load(handle)
+        tables.update((financial_year, TierTable(tiers)) for financial_year, tiers in config.items())
+
+    tables.setdefault("default", TierTable(DEFAULT_TIERS))
+    tables[None] = tables["default"]
+    _TABLES.update(tables)
+    return _TABLES
+
+
+def tier_table(financial_year: str | None = None) -> TierTable:
+    tables = _TABLES or _load_tables()
+    return tables.get(financial_year) or tables["default"]
+
+
+def get_badge_for_tax(tax_paid: int, financial_year: str | None = None) -> str:
+    # hot path: years without tiers of their own use the default (None) table;
+    # only the first call, before the tables are loaded, goes through tier_table()
+    table = _TABLES.get(financial_year) or _TABLES.get(None)
+    if table is None:
+        table = tier_table(financial_year)
+    return table.classify(tax_paid)
+
+
+def classify_submissions(rows: Iterable[tuple[str | None, int]]) -> list[str]:
+    """Badges for many (financial_year, tax_paid) pairs, in input order."""
+    rows = list(rows)
+    years = {financial_year for financial_year, _ in rows}
+    if len(years) == 1:
+        return tier_table(years.pop()).classify_many(tax_paid for _, tax_paid in rows)
+
+    positions: dict[str | None, list[int]] = defaultdict(list)
+    for index, (financial_year, _) in enumerate(rows):
+        positions[financial_year].append(index)
+
+    badges: list[str] = [NOT_ELIGIBLE] * len(rows)
+    for financial_year, indexes in positions.items():
+        names = tier_table(financial_year).classify_many(rows[index][1] for index in indexes)
+        for index, name in zip(indexes, names):
+            badges[index] = name
+    return badges
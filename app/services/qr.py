@@ -0,0 +1,94 @@
+from functools import lru_cache
+
+import qrcode
+from PIL import Image
+from qrcode.constants import ERROR_CORRECT_M
+from qrcode.exceptions import DataOverflowError
+
+from app.core.config import VERIFY_BASE_URL
+
+BADGE_QR_SIZE = 190
+
+# badge ids are always "NB-" plus ten hex digits
+SAMPLE_BADGE_ID = "NB-0000000000"
+
+
+def verify_url(badge_id: str) -> str:
+    return f"{VERIFY_BASE_URL}/verify/public/{badge_id}"
+
+
+class QRRenderer:
+    """Renders QR codes at a fixed version and mask straight to the target pixel size."""
+
+    def __init__(
+        self,
+        sample_data: str,
+        size: int,
+        error_correction: int = ERROR_CORRECT_M,
+        border: int = 4,
+    ):
+        probe = qrcode.QRCode(error_correction=error_correction, border=border)
+        probe.add_data(sample_data)
+        probe.make(fit=True)
+
+        self.version = probe.version
+        # scoring all eight masks dominates encode time; score once, reuse
+        self.mask_pattern = probe.best_mask_pattern()
+        self.error_correction = error_correction
+        self.border = border
+        self.size = size
+
+        modules = probe.modules_count + 2 * border
+        self.box_size = max(1, size // modules)
+        self.offset = (size - self.box_size * modules) // 2
+
+        self._dark = b"\x00" * self.box_size
+        self._light = b"\xff" * self.box_size
+
+    def matrix(self, data: str) -> list[list[bool]]:
+        qr = qrcode.QRCode(
+            version=self.version,
+            error_correction=self.error_correction,
+            border=self.border,
+            mask_pattern=self.mask_pattern,
+        )
+        qr.add_data(data)
+        try:
+            qr.make(fit=False)
+        except DataOverflowError:
+            # longer than the sample: let qrcode pick a larger version
+            qr = qrcode.QRCode(error_correction=self.error_correction, border=self.border)
+            qr.add_data(data)
+            qr.make(fit=True)
+        return qr.get_matrix()
+
+    def render(self, data: str, out: Image.Image | None = None) -> Image.Image:
+        """Return a 1-bit size x size image; pass `out` to reuse a buffer."""
+        matrix = self.matrix(data)
+        box = min(self.box_size, self.size // len(matrix))
+        if box == self.box_size:
+            dark, light = self._dark, self._light
+        else:
+            dark, light = b"\x00" * box, b"\xff" * box
+
+        rows = []
+        for row in matrix:
+            line = b"".join(dark if cell else light for cell in row)
+            rows.append(line * box)
+
+        side = len(matrix) * box
+        code = Image.frombytes("1", (side, side), b"".join(rows), "raw", "1;8")
+
+        if out is None:
+            out = Image.new("1", (self.size, self.size), 1)
+        else:
+            out.paste(1, (0, 0, self.size, self.size))
+
+        offset = (self.size - side) // 2
+        out.paste(code, (offset, offset))
+        return out
+
+
+@lru_cache(maxsize=1)
+def badge_qr_renderer() -> QRRenderer:
+    return QRRenderer(verify_url(SAMPLE_BADGE_ID), size=BADGE_QR_SIZE)
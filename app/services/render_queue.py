@@ -0,0 +1,278 @@
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+from typing import Iterable
+
+from app.core import metrics
+from app.core.config import RENDER_BATCH_SIZE, RENDER_WORKERS
+from app.core.database import SessionLocal
+from app.services.artifact_store import save_artifact
+from app.services.single_flight import single_flight
+
+QUEUED = "QUEUED"
+RENDERING = "RENDERING"
+READY = "READY"
+FAILED = "FAILED"
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+_jobs: dict[str, Future] = {}
+_jobs_lock = threading.Lock()
+
+# failed jobs stay in _jobs so their status can be reported, but only for a
+# while and only so many of them; a pool crash fails every in-flight badge.
+# Once forgotten, a failed badge is rendered on its next download.
+FAILED_JOB_TTL_SECONDS = 600
+FAILED_JOBS_MAX = 10_000
+_failed: OrderedDict[str, tuple[float, Future]] = OrderedDict()
+
+
+def badge_payload(submission, requestor_email: str) -> dict:
+    generated_at = (submission.badge_generated_at or date.today()).isoformat()
+    expiry_at = (submission.badge_expires_at or date.today()).isoformat()
+
+    return {
+        "badge_name": submission.badge_name or "Nation Builder",
+        "badge_id": submission.badge_id,
+        "fy": submission.financial_year,
+        "requestor_name": requestor_email,
+        "generated_date": generated_at,
+        "expiry_date": expiry_at,
+    }
+
+
+def render_badge_files(payload: dict, kinds=("png", "pdf")) -> dict[str, float]:
+    """Render and store the given files; returns seconds spent rendering each kind."""
+    # Pillow, qrcode and ReportLab load on the first render, so processes
+    # that never render (e.g. verify-only workers) do not pay for them
+    from app.services.badge_generator import generate_badge
+    from app.services.badge_pdf import generate_badge_pdf
+
+    renderers = {"png": generate_badge, "pdf": generate_badge_pdf}
+    rendered = {}
+    timings = {}
+    for kind in kinds:
+        started = time.perf_counter()
+        rendered[kind] = renderers[kind](**payload)
+        timings[kind] = time.perf_counter() - started
+
+    with SessionLocal() as db:
+        for kind, data in rendered.items():
+            save_artifact(db, payload["badge_id"], kind, data)
+        db.commit()
+
+    return timings
+
+
+def record_render_timings(timings: Iterable[tuple[str, float]]) -> None:
+    for kind, seconds in timings:
+        metrics.observe_render(kind, seconds)
+
+
+def render_badge_batch(payloads: list[dict], timings: list | None = None) -> dict[str, str]:
+    failed = {}
+    for payload in payloads:
+        try:
+            with single_flight(payload["badge_id"]):
+                rendered = render_badge_files(payload)
+        except Exception as exc:
+            failed[payload["badge_id"]] = repr(exc)
+        else:
+            if timings is not None:
+                timings.extend(rendered.items())
+    return failed
+
+
+def _render_job(payloads: list[dict]) -> tuple[dict[str, str], list[tuple[str, float]]]:
+    # runs in a worker process; its timings travel back to be recorded by
+    # the API process, which is the one serving /metrics
+    timings = []
+    failed = render_badge_batch(payloads, timings)
+    return failed, timings
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            # spawn keeps workers clear of locks held by the server's threads
+            _executor = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _discard_executor(broken: ProcessPoolExecutor) -> None:
+    global _executor
+
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _job_failed(badge_id: str, future: Future) -> bool:
+    return future.cancelled() or future.exception() is not None or badge_id in future.result()[0]
+
+
+def _prune_failed(now: float) -> None:
+    # caller holds _jobs_lock
+    while _failed:
+        badge_id, (failed_at, future) = next(iter(_failed.items()))
+        if len(_failed) <= FAILED_JOBS_MAX and now - failed_at < FAILED_JOB_TTL_SECONDS:
+            break
+        del _failed[badge_id]
+        if _jobs.get(badge_id) is future:
+            del _jobs[badge_id]
+
+
+def _forget_when_done(badge_ids: list[str], future: Future) -> None:
+    def _cleanup(done: Future):
+        if not done.cancelled() and done.exception() is None:
+            record_render_timings(done.result()[1])
+
+        now = time.monotonic()
+        with _jobs_lock:
+            for badge_id in badge_ids:
+                if _jobs.get(badge_id) is not done:
+                    continue
+                if _job_failed(badge_id, done):
+                    _failed[badge_id] = (now, done)
+                    _failed.move_to_end(badge_id)
+                else:
+                    del _jobs[badge_id]
+            _prune_failed(now)
+
+    future.add_done_callback(_cleanup)
+
+
+def _failed_future(exc: BaseException) -> Future:
+    future = Future()
+    future.set_running_or_notify_cancel()
+    future.set_exception(exc)
+    return future
+
+
+def _chain(source: Future, target: Future) -> None:
+    def _copy(done: Future):
+        if done.cancelled():
+            target.cancel()
+        elif done.exception() is not None:
+            target.set_exception(done.exception())
+        else:
+            target.set_result(done.result())
+
+    source.add_done_callback(_copy)
+
+
+def _submit(payloads: list[dict]) -> Future:
+    """Start a render job; never raises, a job that cannot start is a failed future."""
+    if RENDER_WORKERS <= 0:
+        future = Future()
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(_render_job(payloads))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    for _ in range(2):
+        executor = _get_executor()
+        try:
+            return executor.submit(_render_job, payloads)
+        except BrokenProcessPool as exc:
+            # a worker died (OOM kill, segfault); start a fresh pool and retry once
+            _discard_executor(executor)
+            error = exc
+        except Exception as exc:
+            return _failed_future(exc)
+    return _failed_future(error)
+
+
+def enqueue_render_batch(payloads: list[dict]) -> list[Future]:
+    futures = []
+
+    for start in range(0, len(payloads), RENDER_BATCH_SIZE):
+        # the badges are reserved under the lock and the job is started
+        # outside it: an inline render or a worker spawn would otherwise
+        # stall every status lookup
+        placeholder = Future()
+        with _jobs_lock:
+            chunk = [
+                payload
+                for payload in payloads[start:start + RENDER_BATCH_SIZE]
+                if payload["badge_id"] not in _jobs or _jobs[payload["badge_id"]].done()
+            ]
+            if not chunk:
+                continue
+            for payload in chunk:
+                _failed.pop(payload["badge_id"], None)
+                _jobs[payload["badge_id"]] = placeholder
+
+        badge_ids = [payload["badge_id"] for payload in chunk]
+        future = _submit(chunk)
+        with _jobs_lock:
+            for badge_id in badge_ids:
+                if _jobs.get(badge_id) is placeholder:
+                    _jobs[badge_id] = future
+        # anyone who picked up the placeholder meanwhile waits on the job
+        _chain(future, placeholder)
+
+        _forget_when_done(badge_ids, future)
+        futures.append(future)
+
+    return futures
+
+
+def enqueue_render(payload: dict) -> Future | None:
+    futures = enqueue_render_batch([payload])
+    if futures:
+        return futures[0]
+
+    with _jobs_lock:
+        return _jobs.get(payload["badge_id"])
+
+
+def get_render_status(badge_id: str) -> str | None:
+    with _jobs_lock:
+        future = _jobs.get(badge_id)
+
+    if future is None:
+        return None
+    if not future.done():
+        return RENDERING if future.running() else QUEUED
+    if _job_failed(badge_id, future):
+        return FAILED
+    return READY
+
+
+def wait_for_render(badge_id: str, timeout: float) -> str | None:
+    with _jobs_lock:
+        future = _jobs.get(badge_id)
+
+    if future is None:
+        return None
+
+    try:
+        future.result(timeout=timeout)
+    except Exception:
+        # timeouts and render failures are both reported through the status
+        pass
+
+    return get_render_status(badge_id) or READY
+
+
+def shutdown() -> None:
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
@@ -0,0 +1,58 @@
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from app.core.config import RENDER_LOCK_DIR
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock
+    fcntl = None
+
+# lock files are named by this many hex digits of the key's hash: 16**3 = 4096
+_STRIPE_HEX_DIGITS = 3
+
+_locks: dict[str, list] = {}
+_registry_lock = threading.Lock()
+
+
+@contextmanager
+def _file_lock(key: str):
+    if fcntl is None:
+        yield
+        return
+
+    lock_dir = Path(RENDER_LOCK_DIR)
+    lock_dir.mkdir(parents=True, exist_ok=True)
+    # keys share a fixed set of lock files rather than one file per key, so
+    # the directory stays bounded; keys on the same stripe wait for each other
+    stripe = hashlib.sha256(key.encode()).hexdigest()[:_STRIPE_HEX_DIGITS]
+
+    fd = os.open(lock_dir / f"{stripe}.lock", os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+@contextmanager
+def single_flight(key: str):
+    # threads of this process queue on a shared Lock; other worker
+    # processes queue on an flock of the key's lock stripe. Do not nest
+    # single_flight calls: two keys on one stripe would wait on each other.
+    with _registry_lock:
+        entry = _locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+
+    try:
+        with entry[0], _file_lock(key):
+            yield
+    finally:
+        with _registry_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _locks[key]
@@ -0,0 +1,209 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+from app.core.config import (
+    VERIFY_CACHE_MAX_ENTRIES,
+    VERIFY_CACHE_TTL_SECONDS,
+    VERIFY_CACHE_URL,
+)
+
+
+# how long an invalidation blocks writes of values read before it
+INVALIDATION_WINDOW_SECONDS = 60
+
+
+class LocalCacheBackend:
+    """In-process TTL + LRU store. Also stands in for a shared backend in dev."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            stored_at, value = entry
+            if time.monotonic() - stored_at >= self.ttl_seconds:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict, loaded_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str, invalidated_at: float) -> None:
+        self.delete_many([key], invalidated_at)
+
+    def delete_many(self, keys: list[str], invalidated_at: float) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """Shared backend for multi-worker deployments; needs the optional redis package."""
+
+    prefix = "verify:"
+    tombstone_prefix = "verify-invalidated:"
+
+    # skip the write when the badge was invalidated after the value was read
+    # from the database, checked and written in one step
+    _SET_UNLESS_INVALIDATED = """
+    local invalidated_at = redis.call('GET', KEYS[2])
+    if invalidated_at and tonumber(invalidated_at) >= tonumber(ARGV[2]) then
+        return 0
+    end
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+    return 1
+    """
+
+    def __init__(self, url: str, ttl_seconds: float):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self._set_unless_invalidated = self.client.register_script(self._SET_UNLESS_INVALIDATED)
+
+    def get(self, key: str) -> dict | None:
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: dict, loaded_at: float) -> None:
+        self._set_unless_invalidated(
+            keys=[self.prefix + key, self.tombstone_prefix + key],
+            args=[json.dumps(value), repr(loaded_at), max(1, int(self.ttl_seconds))],
+        )
+
+    def delete(self, key: str, invalidated_at: float) -> None:
+        self.delete_many([key], invalidated_at)
+
+    def delete_many(self, keys: list[str], invalidated_at: float) -> None:
+        # one round trip; the tombstones outlive any read still in flight in
+        # another worker
+        pipeline = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.set(self.tombstone_prefix + key, repr(invalidated_at), ex=INVALIDATION_WINDOW_SECONDS)
+        pipeline.delete(*(self.prefix + key for key in keys))
+        pipeline.execute()
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(self.prefix + "*"):
+            self.client.delete(key)
+
+
+class VerifyCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # in invalidation order, so the expired ones are always at the front
+        self._invalidated_at: OrderedDict[str, float] = OrderedDict()
+
+    def get(self, badge_id: str) -> dict | None:
+        value = self.backend.get(badge_id)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, badge_id: str, value: dict, loaded_at: float) -> None:
+        """Cache a value read from the database at `loaded_at` (time.time())."""
+        # drop results read from the DB before a concurrent invalidation;
+        # the shared backend repeats this check against other workers
+        with self._lock:
+            invalidated_at = self._invalidated_at.get(badge_id)
+        if invalidated_at is not None and invalidated_at >= loaded_at:
+            return
+
+        self.backend.set(badge_id, value, loaded_at)
+
+    def invalidate(self, badge_id: str | None) -> None:
+        self.invalidate_many([badge_id])
+
+    def invalidate_many(self, badge_ids) -> None:
+        badge_ids = [badge_id for badge_id in badge_ids if badge_id]
+        if not badge_ids:
+            return
+
+        now = time.time()
+        with self._lock:
+            for badge_id in badge_ids:
+                self._invalidated_at[badge_id] = now
+                self._invalidated_at.move_to_end(badge_id)
+            while self._invalidated_at:
+                oldest = next(iter(self._invalidated_at.values()))
+                if now - oldest < INVALIDATION_WINDOW_SECONDS:
+                    break
+                self._invalidated_at.popitem(last=False)
+
+        self.backend.delete_many(badge_ids, now)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+
+        lookups = hits + misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def _build_backend():
+    if VERIFY_CACHE_URL:
+        return RedisCacheBackend(VERIFY_CACHE_URL, VERIFY_CACHE_TTL_SECONDS)
+    return LocalCacheBackend(VERIFY_CACHE_MAX_ENTRIES, VERIFY_CACHE_TTL_SECONDS)
+
+
+verify_cache = VerifyCache(_build_backend())
+
+
+def cache_entry(submission) -> dict:
+    expires_at = submission.badge_expires_at
+    return {
+        "badge_id": submission.badge_id,
+        "badge_name": submission.badge_name,
+        "financial_year": submission.financial_year,
+        "expires_at": expires_at.isoformat() if expires_at else None,
+    }
+
+
+def verification_result(entry: dict, today: date | None = None) -> dict:
+    # expiry is evaluated on every read so a cached entry never outlives its badge
+    expires_at = date.fromisoformat(entry["expires_at"]) if entry["expires_at"] else None
+    is_expired = expires_at is not None and expires_at < (today or date.today())
+
+    return {
+        "valid": not is_expired,
+        "badge_id": entry["badge_id"],
+        "badge_name": entry["badge_name"],
+        "financial_year": entry["financial_year"],
+        "expires_at": expires_at,
+        "status": "EXPIRED" if is_expired else "VALID",
+    }
@@ -0,0 +1,282 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from app.tools.benchmarks import SAMPLE_BADGE, measure, summarize
+from app.tools.seed_data import FINANCIAL_YEARS, seed, seed_admin_token, use_scratch_database
+
+# bump when the layout of the result file changes
+RESULT_FORMAT = 1
+
+SCENARIOS = ("verify", "submission_mine", "admin_submissions", "admin_approve")
+
+# scenarios that change data; not run by default against an existing database
+WRITE_SCENARIOS = ("admin_approve",)
+
+LISTING_STATUSES = ("PENDING", "APPROVED", "REJECTED")
+
+
+async def drive(app, plan: list[tuple[str, str, str]], concurrency: int) -> dict:
+    """Send (method, url, token) requests through the ASGI app, `concurrency` at a time."""
+    import httpx
+
+    timings = []
+    errors = 0
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(client, method, url, token):
+        nonlocal errors
+        async with gate:
+            started = time.perf_counter()
+            response = await client.request(method, url, headers={"Authorization": f"Bearer {token}"})
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(one(client, method, url, token) for method, url, token in plan))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(plan),
+        "errors": errors,
+        "req_per_s": round(len(plan) / elapsed, 1),
+        **summarize(timings),
+    }
+
+
+def _sample(rng: random.Random, sample_size: int, approvals: int) -> dict:
+    """Tokens and IDs spread over the whole table, picked by random primary key."""
+    from sqlalchemy import func, select
+
+    from app.core.auth import create_access_token
+    from app.core.database import SessionLocal
+    from app.models.submission import TaxSubmission
+    from app.models.user import User
+
+    with SessionLocal() as db:
+        low, high = db.execute(select(func.min(TaxSubmission.id), func.max(TaxSubmission.id))).one()
+        if low is None:
+            raise SystemExit("no submissions to benchmark against; seed the database first")
+
+        ids = rng.sample(range(low, high + 1), min(sample_size, high - low + 1))
+        rows = []
+        for start in range(0, len(ids), 500):
+            rows.extend(
+                db.execute(
+                    select(TaxSubmission.user_id, TaxSubmission.status, TaxSubmission.badge_id, User.email)
+                    .join(User, User.id == TaxSubmission.user_id)
+                    .where(TaxSubmission.id.in_(ids[start:start + 500]))
+                ).all()
+            )
+
+        pending = db.scalars(
+            select(TaxSubmission.id)
+            .where(TaxSubmission.status == "PENDING")
+            .order_by(TaxSubmission.id.desc())
+            .limit(approvals)
+        ).all()
+
+    if not rows:
+        raise SystemExit("sampled submissions not found; is the table sparse?")
+
+    tokens = {row.user_id: create_access_token(row.user_id, row.email, "user") for row in rows}
+    return {
+        "user_tokens": list(tokens.values()),
+        "badges": [(tokens[row.user_id], row.badge_id) for row in rows if row.status == "APPROVED"],
+        "pending_ids": list(pending),
+        "admin_token": seed_admin_token(),
+    }
+
+
+def _plans(scenarios, sample: dict, requests: int, rng: random.Random) -> dict:
+    admin_token = sample["admin_token"]
+    builders = {
+        "verify": lambda: [
+            ("GET", f"/verify/{badge_id}", token)
+            for token, badge_id in (rng.choice(sample["badges"]) for _ in range(requests))
+        ],
+        "submission_mine": lambda: [
+            ("GET", "/submission/mine", rng.choice(sample["user_tokens"])) for _ in range(requests)
+        ],
+        "admin_submissions": lambda: [
+            ("GET", f"/admin/submissions?status={rng.choice(LISTING_STATUSES)}", admin_token)
+            for _ in range(requests)
+        ],
+        # each pending submission can be approved once
+        "admin_approve": lambda: [
+            ("POST", f"/admin/approve/{submission_id}", admin_token) for submission_id in sample["pending_ids"]
+        ],
+    }
+    return {scenario: builders[scenario]() for scenario in scenarios}
+
+
+async def run_http(app, plans: dict, concurrency: int) -> dict:
+    # one event loop for every scenario: the async engine's pool is bound to it
+    results = {}
+    for scenario, plan in plans.items():
+        if plan:
+            results[scenario] = await drive(app, plan, concurrency)
+            _print_result(scenario, results[scenario])
+    return results
+
+
+def run_micro(iterations: int) -> dict:
+    from app.services.badge_generator import generate_badge
+    from app.services.badge_pdf import generate_badge_pdf
+    from app.services.badge_service import get_badge_for_tax
+
+    rng = random.Random(7)
+    # real callers always pass the submission's financial year
+    rows = [(rng.choice(FINANCIAL_YEARS), rng.randrange(0, 4_000_000)) for _ in range(10_000)]
+    return {
+        "get_badge_for_tax[10k]": measure(
+            lambda: [get_badge_for_tax(tax, financial_year) for financial_year, tax in rows], iterations
+        ),
+        "generate_badge": measure(lambda: generate_badge(**SAMPLE_BADGE), iterations),
+        "generate_badge_pdf": measure(lambda: generate_badge_pdf(**SAMPLE_BADGE), iterations),
+    }
+
+
+def compare(results: dict, baseline: dict) -> list[tuple[str, float, float, float]]:
+    """(case, baseline p50, current p50, % change) for every case in both runs."""
+    rows = []
+    for section in ("http", "micro"):
+        for case, result in results.get(section, {}).items():
+            before = baseline.get(section, {}).get(case)
+            if before and before["p50_ms"]:
+                change = (result["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100
+                rows.append((f"{section}/{case}", before["p50_ms"], result["p50_ms"], round(change, 1)))
+    return rows
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_result(case: str, result: dict) -> None:
+    throughput = f"{result['req_per_s']:>9.1f} req/s  " if "req_per_s" in result else ""
+    errors = f"  errors {result['errors']}" if "errors" in result else ""
+    print(
+        f"{case:<28} {throughput}mean {result['mean_ms']:>9.3f} ms"
+        f"  p50 {result['p50_ms']:>9.3f} ms  p95 {result['p95_ms']:>9.3f} ms{errors}"
+    )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Seed synthetic data, load the hot API routes in process and time the badge "
+        "service; results can be written as JSON and compared against an earlier run"
+    )
+    parser.add_argument("scenarios", nargs="*", help=f"any of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--users", type=int, default=10_000, help="users to seed into the scratch database")
+    parser.add_argument("--submissions-per-user", type=int, default=2)
+    parser.add_argument("--existing-db", action="store_true",
+                        help="benchmark the configured DATABASE_URL as it is instead of a seeded "
+                        "scratch database (write scenarios only run when named)")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per read scenario")
+    parser.add_argument("--approvals", type=int, default=200, help="requests for admin_approve")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=50, help="runs per micro-benchmark")
+    parser.add_argument("--no-micro", action="store_true", help="skip the micro-benchmarks")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for data and request mix")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results of an earlier run")
+    parser.add_argument("--max-regression", type=float, default=None, metavar="PERCENT",
+                        help="with --compare, fail when a p50 is this much slower than the baseline")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    if not args.scenarios:
+        skipped = WRITE_SCENARIOS if args.existing_db else ()
+        args.scenarios = [scenario for scenario in SCENARIOS if scenario not in skipped]
+
+    # measure the database path rather than the verify cache, unless asked
+    os.environ.setdefault("VERIFY_CACHE_TTL_SECONDS", "0")
+    if not args.existing_db:
+        use_scratch_database("bench", verify_cache_ttl=os.environ["VERIFY_CACHE_TTL_SECONDS"])
+
+    from app.core import migrations
+    from app.core.database import engine
+
+    if args.existing_db:
+        migrations.ensure_current(engine)
+        seeded = None
+    else:
+        migrations.upgrade(engine)
+        seeded = seed(args.users, args.submissions_per_user, random_seed=args.seed)
+        print(f"seeded {seeded['users']} users, {seeded['submissions']} submissions in {seeded['seconds']:.1f} s")
+
+    from app.main import app
+    from app.services import render_queue
+
+    rng = random.Random(args.seed)
+    sample = _sample(rng, max(args.requests, 1000), args.approvals)
+    http = asyncio.run(run_http(app, _plans(args.scenarios, sample, args.requests, rng), args.concurrency))
+    # approvals queue renders; let them finish before timing the renderers
+    render_queue.shutdown()
+
+    micro = {} if args.no_micro else run_micro(args.iterations)
+    for case, result in micro.items():
+        _print_result(case, result)
+
+    results = {
+        "format": RESULT_FORMAT,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "database": engine.dialect.name,
+        },
+        "parameters": {
+            key: getattr(args, key)
+            for key in ("users", "submissions_per_user", "existing_db", "requests", "approvals",
+                        "concurrency", "iterations", "seed")
+        },
+        "seed": seeded,
+        "http": http,
+        "micro": micro,
+    }
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(results, handle, indent=2, sort_keys=True)
+        print(f"results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        if baseline.get("format") != RESULT_FORMAT:
+            sys.exit(f"{args.compare} uses result format {baseline.get('format')}, expected {RESULT_FORMAT}")
+
+        regressions = []
+        print(f"p50 compared with {args.compare} ({baseline.get('git_commit') or 'unknown commit'}):")
+        for case, before, after, change in compare(results, baseline):
+            print(f"  {case:<36} {before:>9.3f} ms -> {after:>9.3f} ms  {change:+6.1f}%")
+            if args.max_regression is not None and change > args.max_regression:
+                regressions.append(case)
+        if regressions:
+            print(f"FAIL p50 regressed more than {args.max_regression}%: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import argparse
+import statistics
+import time
+
+SAMPLE_BADGE = {
+    "badge_name": "Gold Contributor",
+    "badge_id": "NB-0123456789",
+    "fy": "FY 2024-25",
+    "requestor_name": "taxpayer@example.com",
+    "generated_date": "2025-01-15",
+    "expiry_date": "2026-03-31",
+}
+
+
+def summarize(timings: list[float]) -> dict:
+    """Mean and percentiles of a list of millisecond timings."""
+    timings = sorted(timings)
+    return {
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "p50_ms": round(timings[len(timings) // 2], 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+    }
+
+
+def measure(fn, iterations: int, setup=None) -> dict:
+    timings = []
+    for _ in range(iterations):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return {"iterations": iterations, **summarize(timings)}
+
+
+def bench_render(iterations: int) -> dict:
+    from app.services.badge_generator import badge_template, generate_badge
+
+    return {
+        "generate_badge[no template cache]": measure(
+            lambda: generate_badge(**SAMPLE_BADGE), iterations, setup=badge_template.cache_clear
+        ),
+        "generate_badge[template cache]": measure(
+            lambda: generate_badge(**SAMPLE_BADGE), iterations
+        ),
+    }
+
+
+def bench_qr(iterations: int) -> dict:
+    import qrcode
+    from PIL import Image
+
+    from app.services.qr import BADGE_QR_SIZE, badge_qr_renderer, verify_url
+
+    url = verify_url(SAMPLE_BADGE["badge_id"])
+    renderer = badge_qr_renderer()
+    buffer = Image.new("1", (BADGE_QR_SIZE, BADGE_QR_SIZE), 1)
+
+    return {
+        "qrcode.make().resize()": measure(
+            lambda: qrcode.make(url).resize((BADGE_QR_SIZE, BADGE_QR_SIZE)), iterations
+        ),
+        "QRRenderer.render()": measure(lambda: renderer.render(url), iterations),
+        "QRRenderer.render(out=buffer)": measure(lambda: renderer.render(url, out=buffer), iterations),
+    }
+
+
+def bench_pdf(iterations: int) -> dict:
+    from app.services.badge_pdf import generate_badge_pdf, generate_badge_pdf_batch
+
+    batch = [dict(SAMPLE_BADGE, badge_id=f"NB-{index:010d}") for index in range(50)]
+    batch_result = measure(lambda: generate_badge_pdf_batch(batch), max(1, iterations // 10))
+    per_badge = {
+        key: round(value / len(batch), 3) if key.endswith("_ms") else value
+        for key, value in batch_result.items()
+    }
+
+    return {
+        "generate_badge_pdf": measure(lambda: generate_badge_pdf(**SAMPLE_BADGE), iterations),
+        "generate_badge_pdf_batch[per badge]": per_badge,
+    }
+
+
+def bench_tiers(iterations: int) -> dict:
+    import random
+
+    from app.services.badge_service import (
+        DEFAULT_TIERS,
+        classify_submissions,
+        get_badge_for_tax,
+        tier_table,
+    )
+
+    # the old linear scan over (min, max, badge) ranges, kept as a baseline
+    ranges = [
+        (bound, next_bound - 1, name)
+        for (bound, name), (next_bound, _) in zip(DEFAULT_TIERS, DEFAULT_TIERS[1:] + [(float("inf"), "")])
+    ]
+
+    def linear_scan(tax_paid):
+        for min_tax, max_tax, badge in ranges:
+            if min_tax <= tax_paid <= max_tax:
+                return badge
+        return "Not Eligible"
+
+    rng = random.Random(7)
+    taxes = [rng.randrange(0, 4_000_000) for _ in range(10_000)]
+    rows = [(rng.choice(("FY 2023-24", "FY 2024-25")), tax) for tax in taxes]
+    one_year = [("FY 2024-25", tax) for tax in taxes]
+    table = tier_table()
+
+    # every case classifies the same 10k values
+    return {
+        "linear scan[10k]": measure(lambda: [linear_scan(tax) for tax in taxes], iterations),
+        "get_badge_for_tax[10k]": measure(
+            lambda: [get_badge_for_tax(tax, financial_year) for financial_year, tax in rows], iterations
+        ),
+        "TierTable.classify_many[10k]": measure(lambda: table.classify_many(taxes), iterations),
+        "classify_submissions[10k, 1 year]": measure(lambda: classify_submissions(one_year), iterations),
+        "classify_submissions[10k, 2 years]": measure(lambda: classify_submissions(rows), iterations),
+    }
+
+
+BENCHMARKS = {
+    "render": bench_render,
+    "qr": bench_qr,
+    "pdf": bench_pdf,
+    "tiers": bench_tiers,
+}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the badge service")
+    parser.add_argument("benchmarks", nargs="*", help=f"any of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    unknown = set(args.benchmarks) - BENCHMARKS.keys()
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+    args.benchmarks = args.benchmarks or list(BENCHMARKS)
+
+    for name in args.benchmarks:
+        for case, result in BENCHMARKS[name](args.iterations).items():
+            print(
+                f"{case:<45} mean {result['mean_ms']:>9.3f} ms"
+                f"  p50 {result['p50_ms']:>9.3f} ms  p95 {result['p95_ms']:>9.3f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
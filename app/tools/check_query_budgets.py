@@ -0,0 +1,99 @@
+import argparse
+import sys
+
+from app.tools.seed_data import badge_holders, seed, seed_admin_token, use_scratch_database
+
+# (label, method, path, needs admin token, max queries, request once first).
+# {badge_id} and {pending_id} are filled in from the seed data. Budgets are
+# for the steady state: the verify cache is off, caches that a first request
+# fills (rendered files, the revocation list) are warm.
+QUERY_BUDGETS = [
+    ("verify", "GET", "/verify/{badge_id}", False, 1, False),
+    ("verify/public", "GET", "/verify/public/{badge_id}", False, 1, False),
+    ("verify/batch", "POST", "/verify/batch", False, 1, False),
+    ("submission/me", "GET", "/submission/me", False, 1, False),
+    ("submission/mine", "GET", "/submission/mine", False, 1, False),
+    ("submission/my-badges", "GET", "/submission/my-badges", False, 1, False),
+    ("badge/status", "GET", "/badge/{badge_id}/status", False, 2, False),
+    ("badge/png", "GET", "/badge/{badge_id}/png", False, 2, True),
+    ("badge/pdf", "GET", "/badge/{badge_id}/pdf", False, 2, True),
+    ("admin/submissions", "GET", "/admin/submissions?status=PENDING", True, 2, False),
+    ("admin/approve", "POST", "/admin/approve/{pending_id}", True, 2, False),
+]
+
+
+def check(verbose: bool = False) -> list[str]:
+    from fastapi.testclient import TestClient
+    from sqlalchemy import func, select
+
+    from app.core import migrations
+    from app.core.database import SessionLocal, engine
+    from app.core.sql_profiler import QueryBudgetExceeded, query_budget
+    from app.main import app
+    from app.models.submission import TaxSubmission
+    from app.services import render_queue
+
+    migrations.upgrade(engine)
+    seed(users=50, submissions_per_user=2)
+    user_token, badge_id = badge_holders(1)[0]
+    admin_token = seed_admin_token()
+    with SessionLocal() as db:
+        pending_id = db.scalar(select(func.min(TaxSubmission.id)).where(TaxSubmission.status == "PENDING"))
+
+    failures = []
+    with TestClient(app) as client:
+        # loads the token revocation list, which each process refreshes on a timer
+        client.get("/submission/me", headers={"Authorization": f"Bearer {user_token}"})
+
+        for label, method, path, as_admin, budget, warm in QUERY_BUDGETS:
+            request = {
+                "method": method,
+                "url": path.format(badge_id=badge_id, pending_id=pending_id),
+                "headers": {"Authorization": f"Bearer {admin_token if as_admin else user_token}"},
+                "json": {"badge_ids": [badge_id, "NB-MISSING"]} if path == "/verify/batch" else None,
+            }
+            if warm:
+                client.request(**request)
+
+            try:
+                with query_budget(budget, label) as log:
+                    response = client.request(**request)
+            except QueryBudgetExceeded as exc:
+                failures.append(str(exc))
+
+            if response.status_code >= 400:
+                failures.append(f"{label}: HTTP {response.status_code}")
+                continue
+            for shape, count in log.repeated().items():
+                failures.append(f"{label}: same statement {count} times (N+1?)\n    {shape}")
+            if verbose:
+                print(f"{label}: {len(log)} queries, {log.total_seconds * 1000:.3f} ms")
+                print(log.report())
+
+    render_queue.shutdown()
+    return failures
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Fail if a hot endpoint issues more SQL statements than its budget, "
+        "or repeats one statement (N+1)"
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every statement")
+    args = parser.parse_args(argv)
+
+    # counted against a scratch database; renders go to a worker process so
+    # approvals are measured without the render's own queries
+    use_scratch_database("budgets", render_workers=1)
+
+    failures = check(verbose=args.verbose)
+    for failure in failures:
+        print(f"FAIL {failure}")
+
+    if failures:
+        sys.exit(1)
+    print(f"OK: {len(QUERY_BUDGETS)} endpoints within their query budgets")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import re
+import sys
+
+from app.tools.seed_data import badge_holders, seed, seed_admin_token, use_scratch_database
+
+# (label, path, needs admin token); {badge_id} is filled in from the seed data
+HOT_ENDPOINTS = [
+    ("submission/me", "/submission/me", False),
+    ("submission/mine", "/submission/mine", False),
+    ("submission/my-badges", "/submission/my-badges", False),
+    ("verify", "/verify/{badge_id}", False),
+    ("verify/public", "/verify/public/{badge_id}", False),
+    ("badge/status", "/badge/{badge_id}/status", False),
+    ("badge/png", "/badge/{badge_id}/png", False),
+    ("admin/submissions?status", "/admin/submissions?status=PENDING", True),
+]
+
+# SQLite reports full table scans as "SCAN <table>" ("SCAN TABLE <table>"
+# before 3.36); index lookups are "SEARCH <table> USING ...".
+TABLE_SCAN = re.compile(r"^SCAN (TABLE )?(\w+)\b(?! USING (COVERING )?INDEX)")
+
+
+def _capture_selects(statements: list):
+    from app.core import query_events
+
+    def capture(statement, parameters, seconds):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    query_events.add_consumer(capture)
+
+
+def check(verbose: bool = False) -> list[str]:
+    from fastapi.testclient import TestClient
+
+    from app.core import migrations
+    from app.core.database import engine
+    from app.main import app
+
+    migrations.upgrade(engine)
+    seed(users=200, submissions_per_user=2)
+    user_token, badge_id = badge_holders(1)[0]
+    admin_token = seed_admin_token()
+    statements: list = []
+    _capture_selects(statements)
+
+    failures = []
+    with TestClient(app) as client, engine.connect() as conn:
+        for label, path, as_admin in HOT_ENDPOINTS:
+            token = admin_token if as_admin else user_token
+            statements.clear()
+            response = client.get(
+                path.format(badge_id=badge_id), headers={"Authorization": f"Bearer {token}"}
+            )
+            if response.status_code >= 400:
+                failures.append(f"{label}: HTTP {response.status_code}")
+                continue
+
+            for statement, parameters in list(statements):
+                plan = [
+                    row[-1]
+                    for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+                ]
+                scans = [line for line in plan if TABLE_SCAN.match(line)]
+                if scans:
+                    failures.append(f"{label}: {'; '.join(scans)}\n    {' '.join(statement.split())}")
+                if verbose:
+                    print(f"{label}: {' '.join(statement.split())}")
+                    for line in plan:
+                        print(f"    {line}")
+
+    return failures
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Fail if a hot endpoint's SQL needs a full table scan (SQLite EXPLAIN QUERY PLAN)"
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args(argv)
+
+    # plans are checked against a scratch database built by the migrations
+    use_scratch_database("plans", render_workers=0)
+
+    failures = check(verbose=args.verbose)
+    for failure in failures:
+        print(f"FAIL {failure}")
+
+    if failures:
+        sys.exit(1)
+    print(f"OK: {len(HOT_ENDPOINTS)} endpoints, no full table scans")
+
+
+if __name__ == "__main__":
+    main()
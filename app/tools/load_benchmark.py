@@ -0,0 +1,116 @@
+import argparse
+import asyncio
+import random
+
+from app.tools.seed_data import badge_holders, seed, use_scratch_database
+
+MODES = ("sync", "async")
+
+
+def _sync_app():
+    """The hot routes as plain ``def`` handlers on the sync session, for comparison."""
+    from fastapi import Depends, FastAPI, HTTPException
+    from sqlalchemy.orm import Session
+
+    from app.core.auth import Principal, get_current_principal
+    from app.core.database import get_db
+    from app.models.submission import TaxSubmission
+    from app.services.verify_cache import cache_entry, verification_result
+
+    app = FastAPI()
+
+    @app.get("/verify/{badge_id}")
+    def verify_badge(
+        badge_id: str,
+        db: Session = Depends(get_db),
+        principal: Principal = Depends(get_current_principal),
+    ):
+        submission = (
+            db.query(TaxSubmission)
+            .filter(TaxSubmission.badge_id == badge_id, TaxSubmission.status == "APPROVED")
+            .first()
+        )
+        if not submission:
+            raise HTTPException(status_code=404, detail="Invalid badge ID")
+        return verification_result(cache_entry(submission))
+
+    @app.get("/submission/me")
+    def get_my_latest_submission(
+        db: Session = Depends(get_db),
+        principal: Principal = Depends(get_current_principal),
+    ):
+        submission = (
+            db.query(TaxSubmission)
+            .filter(TaxSubmission.user_id == principal.id)
+            .order_by(TaxSubmission.id.desc())
+            .first()
+        )
+        return {"id": submission.id, "status": submission.status}
+
+    @app.get("/submission/my-badges")
+    def get_my_badges(
+        db: Session = Depends(get_db),
+        principal: Principal = Depends(get_current_principal),
+    ):
+        submissions = (
+            db.query(TaxSubmission)
+            .filter(TaxSubmission.user_id == principal.id, TaxSubmission.status == "APPROVED")
+            .all()
+        )
+        return [{"badge_id": submission.badge_id} for submission in submissions]
+
+    return app
+
+
+async def _drive(app, identities, requests: int, concurrency: int) -> dict:
+    from app.tools.benchmark_suite import drive
+
+    paths = ("/verify/{badge_id}", "/submission/me", "/submission/my-badges")
+    rng = random.Random(42)
+    plan = []
+    for _ in range(requests):
+        token, badge_id = rng.choice(identities)
+        plan.append(("GET", rng.choice(paths).format(badge_id=badge_id), token))
+    return await drive(app, plan, concurrency)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare the sync and async database paths under concurrent load"
+    )
+    parser.add_argument("modes", nargs="*", help=f"any of: {', '.join(MODES)}")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--users", type=int, default=500,
+                        help="users to seed; those holding an approved badge send the requests")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+    args.modes = args.modes or list(MODES)
+
+    # always a scratch database; verify results are not cached so every
+    # request reaches the database
+    use_scratch_database("load")
+
+    from app.core import migrations
+    from app.core.database import engine
+    from app.main import app as async_app
+
+    migrations.upgrade(engine)
+    seed(args.users)
+    identities = badge_holders(args.users)
+    apps = {"sync": _sync_app, "async": lambda: async_app}
+
+    for mode in args.modes:
+        result = asyncio.run(_drive(apps[mode](), identities, args.requests, args.concurrency))
+        print(
+            f"{mode:<6} {result['req_per_s']:>9.1f} req/s  mean {result['mean_ms']:>8.3f} ms"
+            f"  p50 {result['p50_ms']:>8.3f} ms  p95 {result['p95_ms']:>8.3f} ms"
+            f"  errors {result['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
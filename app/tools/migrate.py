@@ -0,0 +1,29 @@
+import argparse
+
+from app.core import migrations
+from app.core.database import engine
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Apply pending schema migrations; run once per deploy, before the app starts"
+    )
+    parser.add_argument("--status", action="store_true", help="show the schema version and exit")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        pending = migrations.pending(engine)
+        print(f"head version {migrations.HEAD}, {len(pending)} pending")
+        for migration in pending:
+            print(f"  {migration.version:>4}  {migration.description}")
+        return
+
+    applied = migrations.upgrade(
+        engine,
+        on_step=lambda migration: print(f"applying {migration.version}: {migration.description}"),
+    )
+    print(f"schema at version {migrations.HEAD} ({len(applied)} applied)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from app.core.database import SessionLocal
+from app.models.submission import TaxSubmission
+from app.models.user import User
+from app.services.render_queue import badge_payload, render_badge_batch
+
+
+def _read_checkpoint(path: Path) -> int:
+    try:
+        return int(path.read_text().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def _write_checkpoint(path: Path, last_id: int) -> None:
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(str(last_id))
+    os.replace(tmp_path, path)
+
+
+def _approved_batches(after_id: int, batch_size: int, financial_year: str | None):
+    # keyset pages instead of one long cursor: an open read would hold
+    # SQLite's shared lock and starve the workers' artifact writes
+    db = SessionLocal()
+    try:
+        last_id = after_id
+        while True:
+            query = (
+                db.query(TaxSubmission, User.email)
+                .join(User, User.id == TaxSubmission.user_id)
+                .filter(
+                    TaxSubmission.status == "APPROVED",
+                    TaxSubmission.badge_id.isnot(None),
+                    TaxSubmission.id > last_id,
+                )
+            )
+            if financial_year:
+                query = query.filter(TaxSubmission.financial_year == financial_year)
+
+            rows = query.order_by(TaxSubmission.id).limit(batch_size).all()
+            if not rows:
+                return
+
+            last_id = rows[-1][0].id
+            batch = [badge_payload(submission, email) for submission, email in rows]
+            db.expunge_all()
+            db.rollback()
+            yield last_id, batch
+    finally:
+        db.close()
+
+
+def rebuild(
+    workers: int,
+    batch_size: int,
+    checkpoint: Path,
+    financial_year: str | None = None,
+    restart: bool = False,
+) -> int:
+    start_after = 0 if restart else _read_checkpoint(checkpoint)
+    if start_after:
+        print(f"resuming after submission id {start_after}")
+
+    rendered = 0
+    failures: list[str] = []
+    started = time.perf_counter()
+    last_report = started
+
+    # batches finish out of order; the checkpoint only moves past a batch
+    # once every batch before it is done, so a restart never skips work
+    in_flight: deque = deque()
+    # set once a whole batch is lost; the checkpoint stays before it so a
+    # resume renders it again
+    checkpoint_held = False
+
+    def settle(block: bool) -> None:
+        nonlocal rendered, last_report, checkpoint_held
+
+        if block and in_flight:
+            wait([future for _, _, future in in_flight], return_when=FIRST_COMPLETED)
+
+        committed_id = None
+        while in_flight and in_flight[0][2].done():
+            last_id, badge_ids, future = in_flight.popleft()
+            try:
+                failed = future.result()
+            except Exception as exc:
+                # e.g. a worker was killed: nothing in the batch is known to
+                # have been rendered
+                failed = dict.fromkeys(badge_ids, repr(exc))
+                checkpoint_held = True
+            failures.extend(f"{badge_id}: {error}" for badge_id, error in failed.items())
+            rendered += len(badge_ids) - len(failed)
+            if not checkpoint_held:
+                committed_id = last_id
+
+        if committed_id is not None:
+            _write_checkpoint(checkpoint, committed_id)
+
+        now = time.perf_counter()
+        if now - last_report >= 5:
+            last_report = now
+            rate = rendered / (now - started)
+            print(f"rendered {rendered}, failed {len(failures)}, {rate:.1f} badges/sec", flush=True)
+
+    def new_executor() -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+    executor = new_executor()
+
+    def submit(batch: list[dict]) -> Future:
+        nonlocal executor
+
+        for _ in range(2):
+            try:
+                return executor.submit(render_badge_batch, batch)
+            except BrokenProcessPool as exc:
+                # a worker died; batches still on the old pool fail with it,
+                # the rest carry on in a fresh one
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = new_executor()
+                error = exc
+
+        future = Future()
+        future.set_exception(error)
+        return future
+
+    try:
+        for last_id, batch in _approved_batches(start_after, batch_size, financial_year):
+            in_flight.append((last_id, [payload["badge_id"] for payload in batch], submit(batch)))
+            while len(in_flight) >= workers * 2:
+                settle(block=True)
+
+        while in_flight:
+            settle(block=True)
+    finally:
+        executor.shutdown(wait=True)
+
+    elapsed = time.perf_counter() - started
+    rate = rendered / elapsed if elapsed else 0.0
+    print(f"done: rendered {rendered}, failed {len(failures)} in {elapsed:.1f}s ({rate:.1f} badges/sec)")
+    for failure in failures:
+        print(f"failed: {failure}", file=sys.stderr)
+
+    return 1 if failures else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Re-render the PNG and PDF artifacts of every approved badge",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--checkpoint", type=Path, default=Path(".rebuild_badges.checkpoint"))
+    parser.add_argument("--financial-year", help="only rebuild badges for this financial year")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start over")
+    args = parser.parse_args(argv)
+
+    return rebuild(
+        workers=max(1, args.workers),
+        batch_size=max(1, args.batch_size),
+        checkpoint=args.checkpoint,
+        financial_year=args.financial_year,
+        restart=args.restart,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
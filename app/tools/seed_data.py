@@ -0,0 +1,215 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+FINANCIAL_YEARS = ("FY 2022-23", "FY 2023-24", "FY 2024-25")
+STATUSES = ("APPROVED", "PENDING", "REJECTED", "INVALIDATED")
+STATUS_WEIGHTS = (60, 30, 8, 2)
+SEED_COMMENTS = {
+    "APPROVED": "Approved",
+    "REJECTED": "Rejected",
+    "INVALIDATED": "Badge invalidated by admin",
+}
+
+# every seeded user can log in with this password
+SEED_PASSWORD = "seed-password"
+
+
+def seed_email(user_id: int) -> str:
+    return f"seed{user_id}@example.com"
+
+
+def use_scratch_database(name: str, render_workers: int | None = None, verify_cache_ttl: str = "0") -> str:
+    """Point the app at a new SQLite database and artifact directory; returns the directory.
+
+    Call before anything imports app.core.config. The verify cache is off by
+    default, so every lookup reaches the database.
+    """
+    scratch = tempfile.mkdtemp(prefix=f"taxbadge-{name}-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{scratch}/taxbadge.db"
+    os.environ["ARTIFACT_ROOT"] = os.path.join(scratch, "badges")
+    os.environ["VERIFY_CACHE_TTL_SECONDS"] = verify_cache_ttl
+    if render_workers is not None:
+        os.environ["RENDER_WORKERS"] = str(render_workers)
+    return scratch
+
+
+def _submission_rows(rng: random.Random, user_ids: range, per_user: int, today: date) -> list[dict]:
+    from app.services.badge_service import classify_submissions
+
+    rows = []
+    for user_id in user_ids:
+        for number in range(per_user):
+            # log-normal tax amounts: most below the first tier, a long tail
+            # reaching the top ones
+            rows.append({
+                "user_id": user_id,
+                "financial_year": rng.choice(FINANCIAL_YEARS),
+                "tax_paid": int(rng.lognormvariate(11.5, 1.2)),
+                "status": rng.choices(STATUSES, STATUS_WEIGHTS)[0],
+                "badge_id": None,
+                "badge_generated_at": None,
+                "badge_expires_at": None,
+                "admin_comment": None,
+                "number": number,
+            })
+
+    badges = classify_submissions((row["financial_year"], row["tax_paid"]) for row in rows)
+    for row, badge in zip(rows, badges):
+        row["badge_name"] = badge
+        number = row.pop("number")
+        if row["status"] == "PENDING":
+            continue
+
+        row["admin_comment"] = SEED_COMMENTS[row["status"]]
+        # like the admin routes, only an approved submission holds a badge
+        # ID; invalidation clears it
+        if row["status"] == "APPROVED":
+            # same expiry rule as approval, so some seeded badges have expired
+            generated_at = today - timedelta(days=rng.randrange(730))
+            row["badge_id"] = f"NB-SEED{row['user_id']:09d}{number:03d}"
+            row["badge_generated_at"] = generated_at
+            row["badge_expires_at"] = date(generated_at.year + 1, 3, 31)
+    return rows
+
+
+def seed(
+    users: int,
+    submissions_per_user: int = 1,
+    batch_size: int = 10_000,
+    random_seed: int = 42,
+    on_batch=None,
+) -> dict:
+    """Insert synthetic users and submissions into the configured database.
+
+    Rows go in through Core executemany inserts, one transaction per batch of
+    users. User IDs continue after the highest existing one, so seeding twice
+    adds more data; with the same seed the generated values are the same.
+    """
+    from sqlalchemy import func, insert, select, text
+
+    from app.core.database import engine
+    from app.core.security import hash_password
+    from app.models.submission import TaxSubmission
+    from app.models.user import User
+
+    rng = random.Random(random_seed)
+    today = date.today()
+    hashed_password = hash_password(SEED_PASSWORD)
+
+    with engine.connect() as conn:
+        first_user_id = (conn.scalar(select(func.max(User.id))) or 0) + 1
+    last_user_id = first_user_id + users - 1
+
+    started = time.perf_counter()
+    submissions = 0
+    for batch_start in range(first_user_id, last_user_id + 1, batch_size):
+        user_ids = range(batch_start, min(batch_start + batch_size, last_user_id + 1))
+        user_rows = [
+            {"id": user_id, "email": seed_email(user_id), "hashed_password": hashed_password, "is_verified": True}
+            for user_id in user_ids
+        ]
+        submission_rows = _submission_rows(rng, user_ids, submissions_per_user, today)
+
+        with engine.begin() as conn:
+            conn.execute(insert(User.__table__), user_rows)
+            conn.execute(insert(TaxSubmission.__table__), submission_rows)
+
+        submissions += len(submission_rows)
+        if on_batch is not None:
+            on_batch(user_ids.stop - first_user_id, submissions)
+
+    if engine.dialect.name == "postgresql":
+        # explicit IDs do not advance the sequence; move it past them so
+        # sign-ups after seeding do not collide
+        with engine.begin() as conn:
+            conn.execute(
+                text("SELECT setval(pg_get_serial_sequence('users', 'id'), :last)"),
+                {"last": last_user_id},
+            )
+
+    seconds = time.perf_counter() - started
+    return {
+        "users": users,
+        "submissions": submissions,
+        "first_user_id": first_user_id,
+        "last_user_id": last_user_id,
+        "seconds": round(seconds, 3),
+        "rows_per_s": round((users + submissions) / seconds, 1) if seconds else None,
+    }
+
+
+def badge_holders(limit: int) -> list[tuple[str, str]]:
+    """(access token, badge ID) for up to `limit` seeded users holding an approved badge."""
+    from sqlalchemy import select
+
+    from app.core.auth import create_access_token
+    from app.core.database import SessionLocal
+    from app.models.submission import TaxSubmission
+    from app.models.user import User
+
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(TaxSubmission.user_id, TaxSubmission.badge_id, User.email)
+            .join(User, User.id == TaxSubmission.user_id)
+            .where(TaxSubmission.status == "APPROVED", TaxSubmission.badge_id.like("NB-SEED%"))
+            .order_by(TaxSubmission.id)
+            .limit(limit)
+        ).all()
+
+    return [(create_access_token(row.user_id, row.email, "user"), row.badge_id) for row in rows]
+
+
+def seed_admin_token() -> str:
+    """Access token for the first ADMIN_EMAILS account, which is created if missing."""
+    from sqlalchemy import select
+
+    from app.core.admin import ADMIN_EMAILS
+    from app.core.auth import create_access_token
+    from app.core.database import SessionLocal
+    from app.core.security import hash_password
+    from app.models.user import User
+
+    email = min(ADMIN_EMAILS)
+    with SessionLocal() as db:
+        user_id = db.scalar(select(User.id).where(User.email == email))
+        if user_id is None:
+            user = User(email=email, hashed_password=hash_password(SEED_PASSWORD), is_verified=True)
+            db.add(user)
+            db.commit()
+            user_id = user.id
+
+    return create_access_token(user_id, email, "admin")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Seed the configured database with synthetic users and tax submissions"
+    )
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--submissions-per-user", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=10_000, help="users inserted per transaction")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for the generated values")
+    args = parser.parse_args(argv)
+
+    from app.core import migrations
+    from app.core.database import engine
+
+    migrations.ensure_current(engine)
+
+    def progress(users_done: int, submissions_done: int) -> None:
+        print(f"  {users_done:>10} users  {submissions_done:>10} submissions", flush=True)
+
+    result = seed(args.users, args.submissions_per_user, args.batch_size, args.seed, on_batch=progress)
+    print(
+        f"seeded {result['users']} users (ids {result['first_user_id']}-{result['last_user_id']}) and "
+        f"{result['submissions']} submissions in {result['seconds']:.1f} s"
+        f" ({result['rows_per_s']:.0f} rows/s); password {SEED_PASSWORD!r}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PROFILES = ("full", "verify")
+
+# must never be imported just by starting the API; they load on first use
+LAZY_MODULES = ("PIL", "qrcode", "reportlab", "passlib", "bcrypt", "argon2", "boto3", "redis")
+
+# runs in a fresh interpreter: import the app, start it, serve one request
+_FIRST_REQUEST = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:
+    status = client.get("/verify/public/NB-STARTUP").status_code
+done = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_request_ms": (done - started) * 1000,
+    "status": status,
+    "lazy_loaded": sorted({name.split(".")[0] for name in sys.modules} & set(sys.argv[1:])),
+}))
+"""
+
+
+def _child_env(profile: str, database_url: str) -> dict:
+    return dict(os.environ, APP_PROFILE=profile, DATABASE_URL=database_url, PYTHONWARNINGS="ignore")
+
+
+def import_profile(profile: str, database_url: str, top: int) -> dict:
+    """Cumulative import time of app.main and the slowest top-level packages."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=_child_env(profile, database_url),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    total_us = 0
+    packages: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|").split("|"))
+        packages[name.split(".")[0]] = packages.get(name.split(".")[0], 0) + int(self_us)
+        if name == "app.main":
+            total_us = int(cumulative_us)
+
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "import_app_main_ms": round(total_us / 1000, 1),
+        "slowest_packages_ms": {name: round(us / 1000, 1) for name, us in slowest},
+    }
+
+
+def first_request(profile: str, database_url: str, repeat: int) -> dict:
+    """Best of `repeat` cold starts; the process wall time includes the interpreter."""
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", _FIRST_REQUEST, *LAZY_MODULES],
+            env=_child_env(profile, database_url),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        run = json.loads(result.stdout.strip().splitlines()[-1])
+        run["process_ms"] = (time.perf_counter() - started) * 1000
+        runs.append(run)
+
+    best = min(runs, key=lambda run: run["first_request_ms"])
+    return {
+        "import_ms": round(best["import_ms"], 1),
+        "first_request_ms": round(best["first_request_ms"], 1),
+        "process_ms": round(best["process_ms"], 1),
+        "status": best["status"],
+        "lazy_loaded": sorted({name for run in runs for name in run["lazy_loaded"]}),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure API cold start (import time and time to first request) per profile"
+    )
+    parser.add_argument("profiles", nargs="*", help=f"any of: {', '.join(PROFILES)}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8, help="slowest packages to list")
+    parser.add_argument("--max-first-request-ms", type=float, default=None,
+                        help="fail when a profile's best time to first request is above this")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.profiles) - set(PROFILES)
+    if unknown:
+        parser.error(f"unknown profiles: {', '.join(sorted(unknown))}")
+    args.profiles = args.profiles or list(PROFILES)
+
+    # the app refuses to start on an unmigrated database, so build a scratch one
+    scratch = tempfile.mkdtemp(prefix="taxbadge-startup-")
+    database_url = f"sqlite:///{scratch}/taxbadge.db"
+    subprocess.run(
+        [sys.executable, "-m", "app.tools.migrate"],
+        env=dict(os.environ, DATABASE_URL=database_url),
+        capture_output=True,
+        check=True,
+    )
+
+    results = {}
+    failures = []
+    for profile in args.profiles:
+        result = dict(import_profile(profile, database_url, args.top))
+        result.update(first_request(profile, database_url, args.repeat))
+        results[profile] = result
+
+        if result["lazy_loaded"]:
+            failures.append(f"{profile}: started with {', '.join(result['lazy_loaded'])} loaded")
+        if result["status"] != 404:
+            failures.append(f"{profile}: first request answered {result['status']}, expected 404")
+        if args.max_first_request_ms is not None and result["first_request_ms"] > args.max_first_request_ms:
+            failures.append(
+                f"{profile}: first request after {result['first_request_ms']} ms "
+                f"(budget {args.max_first_request_ms} ms)"
+            )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for profile, result in results.items():
+            print(
+                f"{profile:<7} import app.main {result['import_app_main_ms']:>7.1f} ms"
+                f"  first request {result['first_request_ms']:>7.1f} ms"
+                f"  process {result['process_ms']:>7.1f} ms"
+            )
+            slowest = ", ".join(f"{name} {ms}" for name, ms in result["slowest_packages_ms"].items())
+            print(f"        slowest: {slowest}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,16 +17,22 @@ type AdminSubmission = {
 
 export default function AdminPage() {
   const [rows, setRows] = useState<AdminSubmission[]>([]);
+  const [nextCursor, setNextCursor] = useState<number | null>(null);
+  const [total, setTotal] = useState(0);
   const [error, setError] = useState("");
   const [userEmail, setUserEmail] = useState("");
   const [financialYear, setFinancialYear] = useState("FY 2024-25");
   const [taxPaid, setTaxPaid] = useState("");
   const [rejectComments, setRejectComments] = useState<Record<number, string>>({});
 
-  const load = async () => {
+  const load = async (cursor: number | null = null) => {
     try {
-      const data = await apiFetch("/admin/submissions");
-      setRows(Array.isArray(data) ? data : []);
+      const query = cursor === null ? "" : `?cursor=${cursor}`;
+      const data = await apiFetch(`/admin/submissions${query}`);
+      const items: AdminSubmission[] = Array.isArray(data?.items) ? data.items : [];
+      setRows((prev) => (cursor === null ? items : [...prev, ...items]));
+      setNextCursor(data?.next_cursor ?? null);
+      setTotal(data?.total ?? 0);
       setError("");
     } catch (e: any) {
       setError(e?.detail || "Failed to load admin data");
@@ -148,7 +154,7 @@ export default function AdminPage() {
         </div>
 
         <div>
-          <h2 className="text-lg mb-3">All submissions</h2>
+          <h2 className="text-lg mb-3">All submissions ({total})</h2>
           {error && <p className="text-red-300">{error}</p>}
           {rows.map((row) => (
             <div key={row.id} className="card mb-3">
@@ -179,6 +185,11 @@ export default function AdminPage() {
               </div>
             </div>
           ))}
+          {nextCursor !== null && (
+            <button className="btn" onClick={() => load(nextCursor)}>
+              Load more
+            </button>
+          )}
         </div>
       </div>
     </ProtectedRoute>
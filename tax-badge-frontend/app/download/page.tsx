@@ -41,6 +41,11 @@ export default function DownloadPage() {
         },
       });
 
+      if (res.status === 202) {
+        setError("Your badge is still being generated. Please try again in a few seconds.");
+        return;
+      }
+
       if (!res.ok) {
         const maybeJson = await res.json().catch(() => null);
         throw new Error(maybeJson?.detail || `Download failed (${res.status})`);
@@ -28,6 +28,10 @@ export async function login(email: string, password: string) {
 }
 
 export function logout() {
+  if (typeof window !== "undefined" && localStorage.getItem("access_token")) {
+    // best effort: revoke the token server-side, the local session ends regardless
+    apiFetch("/auth/logout", { method: "POST" }).catch(() => undefined);
+  }
   localStorage.removeItem("access_token");
   localStorage.removeItem("user_email");
   localStorage.removeItem("is_admin");